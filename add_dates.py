@@ -1,35 +1,98 @@
+import argparse
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional
 
-def add_dates_to_schedule():
+from openpyxl import Workbook
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+def _weekday_number(value) -> Optional[int]:
+    """0 (Monday) – 6 (Sunday) for a Weekday cell like "Mon", "Monday" or 0; None means every day."""
+    if pd.isna(value) or str(value).strip() == '':
+        return None
+    text = str(value).strip().lower()
+    if text.isdigit():
+        return int(text) % 7
+    for number, name in enumerate(WEEKDAYS):
+        if name.startswith(text[:3]):
+            return number
+    raise ValueError(f"Unknown weekday: {value!r}")
+
+def prepare_template(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop untitled rows and resolve the optional Weekday column to numbers.
+
+    Rows with a Weekday only air on that day of the week; rows without one
+    air every day.
+    """
+    template = df[df['Program Title'].notna()].drop(columns=['Date'], errors='ignore').reset_index(drop=True)
+    if 'Weekday' in template.columns:
+        weekday = template['Weekday'].map(_weekday_number).astype('Int8')
+        template = template.drop(columns=['Weekday'])
+    else:
+        weekday = pd.Series(pd.NA, index=template.index, dtype='Int8')
+    return template.assign(_weekday=weekday)
+
+def expand_schedule(template: pd.DataFrame, dates: Iterable[date]) -> pd.DataFrame:
+    """Cross-join a prepared template with ``dates``, keeping each row only on its weekdays."""
+    days = pd.DataFrame({'Date': [d.strftime('%Y-%m-%d') for d in dates],
+                         '_day_weekday': [d.weekday() for d in dates]})
+    expanded = days.merge(template, how='cross')
+    keep = expanded['_weekday'].isna() | (expanded['_weekday'] == expanded['_day_weekday'])
+    expanded = expanded[keep.to_numpy(dtype=bool)]
+    columns = [c for c in template.columns if c != '_weekday'] + ['Date']
+    return expanded[columns].reset_index(drop=True)
+
+def iter_expanded(template: pd.DataFrame, start_date: date, days: int, chunk_days: int = 7) -> Iterator[pd.DataFrame]:
+    """Expand ``days`` days from ``start_date`` in chunks of ``chunk_days`` to bound memory."""
+    template = prepare_template(template)
+    for offset in range(0, days, chunk_days):
+        dates = [start_date + timedelta(days=i) for i in range(offset, min(offset + chunk_days, days))]
+        yield expand_schedule(template, dates)
+
+def write_chunks(chunks: Iterable[pd.DataFrame], output: str) -> int:
+    """Stream chunks to a .xlsx (openpyxl write-only) or .csv file. Returns the row count."""
+    total = 0
+    if output.lower().endswith('.csv'):
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(output, index=False, mode='w' if i == 0 else 'a', header=(i == 0))
+            total += len(chunk)
+        return total
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for i, chunk in enumerate(chunks):
+        if i == 0:
+            sheet.append(list(chunk.columns))
+        values = chunk.astype(object).where(chunk.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            sheet.append(row)
+        total += len(chunk)
+    workbook.save(output)
+    return total
+
+def add_dates_to_schedule(source='sample_tv_schedule.xlsx', output='sample_tv_schedule_with_dates.xlsx',
+                          days=7, start_date=None, chunk_days=7):
     try:
         # Read the existing Excel file
-        df = pd.read_excel('sample_tv_schedule.xlsx')
-        
-        # Get today's date
-        today = datetime.now().date()
-        
-        # Create a list of dates (next 7 days)
-        dates = [(today + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(7)]
-        
-        # Create a new DataFrame with repeated schedule for each date
-        new_rows = []
-        for date in dates:
-            for _, row in df.iterrows():
-                if pd.notna(row['Program Title']):  # Only include rows with program titles
-                    new_row = row.copy()
-                    new_row['Date'] = date
-                    new_rows.append(new_row)
-        
-        # Create new DataFrame with all rows
-        new_df = pd.DataFrame(new_rows)
-        
-        # Save to a new Excel file
-        new_df.to_excel('sample_tv_schedule_with_dates.xlsx', index=False)
-        print("Successfully created 'sample_tv_schedule_with_dates.xlsx' with dates added!")
-        
+        df = pd.read_excel(source)
+
+        # Start today unless told otherwise
+        start_date = start_date or datetime.now().date()
+
+        # Expand the lineup across every date and stream it out chunk by chunk
+        rows = write_chunks(iter_expanded(df, start_date, days, chunk_days), output)
+        print(f"Successfully created '{output}' with {rows} airings over {days} days!")
+
     except Exception as e:
         print(f"An error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    add_dates_to_schedule() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Expand a daily lineup into a dated schedule.")
+    parser.add_argument('--source', default='sample_tv_schedule.xlsx')
+    parser.add_argument('--output', default='sample_tv_schedule_with_dates.xlsx')
+    parser.add_argument('--days', type=int, default=7, help="number of days to generate (e.g. 90 for a season)")
+    parser.add_argument('--start', type=date.fromisoformat, default=None, help="first date, YYYY-MM-DD (default: today)")
+    parser.add_argument('--chunk-days', type=int, default=7, help="days expanded and written per chunk")
+    args = parser.parse_args()
+    add_dates_to_schedule(args.source, args.output, args.days, args.start, args.chunk_days)
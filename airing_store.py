@@ -0,0 +1,237 @@
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import schedule_format
+import timeline
+import title_index
+
+EPOCH = date(1970, 1, 1)
+NO_DAY = np.iinfo(np.int32).min
+NO_MINUTE = -1
+
+
+def _code_dtype(size: int) -> np.dtype:
+    """The smallest unsigned integer type that can index ``size`` distinct values."""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if size <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+class _Dictionary:
+    """A column of repeated values stored as integer codes into its distinct values."""
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        self.values = uniques  # same dtype as the column, so decoded values keep it
+        self.codes = codes.astype(_code_dtype(len(self.values)))
+
+    @property
+    def nbytes(self) -> int:
+        total = self.codes.nbytes + self.values.nbytes
+        if self.values.dtype == object or getattr(self.values.dtype, 'storage', None) == 'python':
+            # nbytes only counts the pointers to Python objects, not the objects themselves
+            total += sum(sys.getsizeof(v) for v in self.values)
+        return total
+
+    def decode(self, positions: np.ndarray):
+        return self.values.take(self.codes[positions])
+
+
+class AiringStore:
+    """A loaded schedule packed into parallel arrays, one entry per airing.
+
+    Titles, channels, raw clock strings and Source are dictionary-encoded
+    (uint8/uint16 codes into their distinct values), dates are int32 days
+    since 1970-01-01 and times int16 minutes since midnight. That is about a
+    dozen bytes per airing plus each distinct string once, where a
+    DataFrame keeps a string object per cell. The store keeps nothing of the
+    frame it was built from, so the merged timeline is dropped once packed
+    and result frames are decoded from the store (``frame``). Titles are
+    searched through a TitleIndex over the distinct titles only.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.size = len(df)
+        self.columns = list(df.columns)
+        self._dictionaries: Dict[str, _Dictionary] = {}
+        self._minutes: Dict[str, np.ndarray] = {}
+        self._other: Dict[str, np.ndarray] = {}
+        self.days = np.full(self.size, NO_DAY, dtype=np.int32)
+        self._date_unit = 'ns'
+
+        for column in self.columns:
+            values = df[column]
+            if column == 'Date':
+                dates = pd.to_datetime(values, errors='coerce')
+                self._date_unit = dates.dt.unit
+                present = dates.notna().to_numpy()
+                self.days[present] = dates[present].to_numpy(dtype='datetime64[D]').astype(np.int32)
+            elif column in ('Start Minutes', 'End Minutes'):
+                self._minutes[column] = values.fillna(NO_MINUTE).to_numpy(dtype=np.int16)
+            elif values.dtype == object or pd.api.types.is_string_dtype(values):
+                self._dictionaries[column] = _Dictionary(values)
+            else:
+                # A copy, so no block of the source frame stays alive
+                self._other[column] = values.to_numpy(copy=True)
+
+        self._empty = self._build_frame(np.empty(0, dtype=np.int32))
+
+        # A workbook with no rows loads without its columns; its store is simply empty
+        titles = self._dictionaries.get('Program Title') or _Dictionary(pd.Series([None] * self.size, dtype=object))
+        self._titles = titles
+        self.title_index = title_index.TitleIndex(pd.Series(titles.values, dtype=object))
+        # Airings grouped by title code, so a title's rows are one slice
+        self._by_title = np.argsort(titles.codes, kind='stable').astype(np.int32)
+        self._title_bounds = np.searchsorted(titles.codes[self._by_title], np.arange(len(titles.values) + 1))
+
+    @property
+    def nbytes(self) -> int:
+        total = self.days.nbytes + self._by_title.nbytes + self._title_bounds.nbytes
+        total += sum(d.nbytes for d in self._dictionaries.values())
+        total += sum(a.nbytes for a in self._minutes.values())
+        total += sum(a.nbytes for a in self._other.values())
+        return total
+
+    @property
+    def bytes_per_airing(self) -> float:
+        return self.nbytes / self.size if self.size else 0.0
+
+    def search(self, title: str) -> np.ndarray:
+        """Positions (in schedule order) of every airing whose title contains ``title``."""
+        codes = [code for i in self.title_index.title_ids(title) for code in self.title_index.rows[i]]
+        if not codes:
+            return np.empty(0, dtype=np.int32)
+        slices = [self._by_title[self._title_bounds[c]:self._title_bounds[c + 1]] for c in codes]
+        return np.sort(np.concatenate(slices))
+
+    def title_ids(self, positions: np.ndarray) -> np.ndarray:
+        """Distinct title codes of the airings at ``positions``; stable for this store only."""
+        return np.unique(self._titles.codes[positions])
+
+    def title_counts(self) -> pd.Series:
+        """Airings per distinct title, most first."""
+        counts = np.bincount(self._titles.codes, minlength=len(self._titles.values))
+        return pd.Series(counts, index=pd.Index(self._titles.values, dtype=object)).sort_values(
+            ascending=False, kind='stable')
+
+    def minutes(self, column: str) -> Optional[np.ndarray]:
+        """Every airing's ``Start Minutes``/``End Minutes`` (NO_MINUTE when unknown), None if not loaded."""
+        return self._minutes.get(column)
+
+    def encoded(self, column: str) -> Optional[Tuple[np.ndarray, pd.Index]]:
+        """(codes, distinct values) of a dictionary-encoded column, None if not loaded."""
+        dictionary = self._dictionaries.get(column)
+        return (dictionary.codes, dictionary.values) if dictionary is not None else None
+
+    def column(self, column: str) -> pd.Series:
+        """One column decoded for every airing; built on each call, not kept."""
+        return pd.Series(self._decode(column, np.arange(self.size)))
+
+    def _decode(self, column: str, positions: np.ndarray):
+        if column == 'Date':
+            days = self.days[positions]
+            dates = days.astype('datetime64[D]')
+            dates[days == NO_DAY] = np.datetime64('NaT')
+            return pd.DatetimeIndex(dates).as_unit(self._date_unit)
+        if column in self._minutes:
+            minutes = pd.array(self._minutes[column][positions], dtype='Int16')
+            minutes[minutes == NO_MINUTE] = pd.NA
+            return minutes
+        if column in self._dictionaries:
+            return self._dictionaries[column].decode(positions)
+        return self._other[column][positions]
+
+    def frame(self, positions: np.ndarray) -> pd.DataFrame:
+        """The airings at ``positions`` as a DataFrame with the loaded schedule's columns."""
+        if len(positions) == 0:
+            return self._empty.copy()
+        return self._build_frame(positions)
+
+    def _build_frame(self, positions: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame({column: self._decode(column, positions) for column in self.columns})
+
+    def records(self, positions: np.ndarray) -> List['Airing']:
+        """Lightweight record objects for the airings at ``positions``."""
+        titles = self._dictionaries['Program Title'].decode(positions)
+        channels = self._dictionaries['Channel Name'].decode(positions)
+        sources = self._dictionaries['Source'].decode(positions) if 'Source' in self._dictionaries else [None] * len(positions)
+        return [Airing(*fields) for fields in zip(titles, channels, self.days[positions].tolist(),
+                                                  self._minutes_at('Start Minutes', positions),
+                                                  self._minutes_at('End Minutes', positions), sources)]
+
+    def _minutes_at(self, column: str, positions: np.ndarray) -> List[int]:
+        if column not in self._minutes:
+            return [NO_MINUTE] * len(positions)
+        return self._minutes[column][positions].tolist()
+
+    def stats(self) -> Dict[str, float]:
+        """Size of the packed arrays, the only copy of the schedule kept in memory."""
+        return {
+            'airings': self.size,
+            'titles': len(self._titles.values),
+            'bytes': self.nbytes,
+            'bytes_per_airing': round(self.bytes_per_airing, 2),
+        }
+
+
+class Airing:
+    """One airing from an AiringStore; clock and date labels are built on access."""
+
+    __slots__ = ('title', 'channel', 'day', 'start_minutes', 'end_minutes', 'source')
+
+    def __init__(self, title: str, channel: str, day: int, start_minutes: int, end_minutes: int,
+                 source: Optional[str] = None):
+        self.title = title
+        self.channel = channel
+        self.day = day  # days since 1970-01-01, NO_DAY when unknown
+        self.start_minutes = start_minutes  # NO_MINUTE when unknown
+        self.end_minutes = end_minutes
+        self.source = source
+
+    @property
+    def date(self) -> Optional[date]:
+        return None if self.day == NO_DAY else EPOCH + timedelta(days=self.day)
+
+    def labels(self) -> Dict[str, Optional[str]]:
+        """The fields of schedule_format.airing_labels, for one airing."""
+        airing_date = self.date
+        return {
+            'title': self.title,
+            'channel': self.channel,
+            'date': airing_date.strftime(schedule_format.DATE_FORMAT) if airing_date else None,
+            'start': schedule_format.CLOCK_LABELS[self.start_minutes] if self.start_minutes != NO_MINUTE else None,
+            'end': schedule_format.CLOCK_LABELS[self.end_minutes] if self.end_minutes != NO_MINUTE else None,
+        }
+
+    def format(self, template: str, fallback: str) -> str:
+        """``template`` filled from labels(), or ``fallback`` when the date or a time is unknown."""
+        labels = self.labels()
+        complete = all(labels[field] is not None for field in ('date', 'start', 'end'))
+        return (template if complete else fallback).format(**labels)
+
+    def __repr__(self) -> str:
+        return f"Airing({self.title!r}, {self.channel!r}, {self.date}, {self.start_minutes}, {self.end_minutes})"
+
+
+def pack(override_df: pd.DataFrame, regular_df: pd.DataFrame) -> AiringStore:
+    """Merge the override and regular schedules and pack the timeline; the frames can then be dropped."""
+    return AiringStore(timeline.merged_timeline(override_df, regular_df))
+
+
+def search_titles(store: AiringStore, title: str) -> pd.DataFrame:
+    """Airings whose Program Title contains ``title`` (case-insensitive), indexed by store position."""
+    positions = store.search(title)
+    return store.frame(positions).set_axis(positions)
+
+
+def search_schedule(title: str, store: AiringStore) -> Tuple[pd.DataFrame, str]:
+    """Search for a show in the merged override/regular timeline; (matches, source label)."""
+    matches = search_titles(store, title)
+    if not matches.empty:
+        return matches, timeline.source_label(matches)
+    return pd.DataFrame(), "None"
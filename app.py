@@ -1,7 +1,12 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
+import airing_store
+import autocomplete
+import fuzzy_match
+import schedule_format
+import schedule_reload
+
 # Set page config
 st.set_page_config(
     page_title="WGVU TV Schedule Bot",
@@ -23,28 +28,28 @@ st.markdown("""
 
 def load_schedules():
     try:
-        # Load both schedules
-        override_df = pd.read_excel('schedule_override.xlsx')
-        regular_df = pd.read_excel('sample_tv_schedule_with_dates.xlsx')
-        return override_df, regular_df
+        # Both schedules, merged and packed (the live snapshot; a background thread swaps in new files)
+        return schedule_reload.current().store
     except FileNotFoundError as e:
         st.error(f"Error: Could not find schedule files. Please make sure both 'schedule_override.xlsx' and 'sample_tv_schedule_with_dates.xlsx' exist.")
-        return None, None
+        return None
 
-def search_schedule(title, override_df, regular_df):
-    title = title.lower()
-    
-    # Search in override schedule
-    override_matches = override_df[override_df['Program Title'].fillna('').str.lower().str.contains(title)]
-    if not override_matches.empty:
-        return override_matches, "Override"
-    
-    # Search in regular schedule
-    regular_matches = regular_df[regular_df['Program Title'].fillna('').str.lower().str.contains(title)]
-    if not regular_matches.empty:
-        return regular_matches, "Regular"
-    
-    return pd.DataFrame(), "None"
+def choose_title(title):
+    # Runs before the rerun, so the search box shows (and searches) the chosen title
+    st.session_state.title_query = title
+
+def suggest_titles(user_input, store):
+    """Offer exact titles that start with what was typed, so the search hits the right show."""
+    if not store.size:
+        return
+    completions = autocomplete.completer_for(store).complete(user_input)
+    if not completions or any(title.lower() == user_input.strip().lower() for title, _ in completions):
+        return
+    st.caption("✨ Did you mean one of these?")
+    for col, (title, upcoming) in zip(st.columns(len(completions)), completions):
+        with col:
+            st.button(title, key=f"complete-{title}", on_click=choose_title, args=(title,),
+                      help=f"{upcoming} upcoming airing{'s' if upcoming != 1 else ''}")
 
 def main():
     # Header
@@ -55,34 +60,36 @@ def main():
     """)
     
     # Load schedules
-    override_df, regular_df = load_schedules()
-    if override_df is None or regular_df is None:
+    store = load_schedules()
+    if store is None:
         return
     
     # Search input
-    user_input = st.text_input("🎯 What show are you looking for?", placeholder="Enter a show title...")
+    user_input = st.text_input("🎯 What show are you looking for?", placeholder="Enter a show title...",
+                               key="title_query")
     
     if user_input:
+        suggest_titles(user_input, store)
         with st.spinner("Searching schedules..."):
-            results, source = search_schedule(user_input, override_df, regular_df)
+            results, source = airing_store.search_schedule(user_input, store)
             
             if not results.empty:
                 # Show results count and source
                 st.markdown(f"**Found {len(results)} match(es) in the {source} schedule:**")
                 
+                # Format dates and times for every match at once
+                labels = schedule_format.airing_labels(results)
+                
                 # Create columns for better layout
-                for _, row in results.iterrows():
+                for row in labels.itertuples(index=False):
                     with st.container():
                         col1, col2 = st.columns([2, 1])
                         
                         with col1:
-                            # Format date and time
-                            date = pd.to_datetime(row['Date']).strftime("%A, %B %d")
-                            start = pd.to_datetime(str(row['Start Time'])).strftime("%I:%M %p")
-                            end = pd.to_datetime(str(row['End Time'])).strftime("%I:%M %p")
+                            date, start, end = row.date, row.start, row.end
                             
                             # Show show title and channel
-                            st.markdown(f"📺 *{row['Program Title']}* on **{row['Channel Name']}**")
+                            st.markdown(f"📺 *{row.title}* on **{row.channel}**")
                             
                         with col2:
                             # Show date and time
@@ -92,7 +99,11 @@ def main():
                         st.markdown("---")
             else:
                 st.warning("❌ No shows found matching your search.")
-                st.info("💡 Try searching with a different title or check for typos.")
+                suggestions = fuzzy_match.suggest_titles(user_input, store)
+                if suggestions:
+                    st.info("💡 Did you mean: " + ", ".join(f"*{title}*" for title in suggestions))
+                else:
+                    st.info("💡 Try searching with a different title or check for typos.")
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,125 @@
+import bisect
+import heapq
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import airing_store
+import schedule_store
+from fuzzy_match import fuzzy_form
+
+# Suggestions returned by default, and the most any caller can ask for
+DEFAULT_SUGGESTIONS = 5
+MAX_SUGGESTIONS = 10
+
+# Prefixes this short match a large share of the titles, so their answers are computed up front
+PRECOMPUTED_PREFIX = 2
+
+
+class TitleCompleter:
+    """Prefix index over the distinct titles of a schedule, ranked by upcoming airings.
+
+    Every word start of every title is a key ("nature", "american
+    experience" and "experience" for two titles), so a prefix finds titles
+    by any of their words. Keys are kept in one sorted list and a prefix is
+    a bisect range in it. Titles are ranked by how many of their airings
+    are on or after today; the keys are built once, and only the ranking
+    (with the precomputed answers for prefixes of up to PRECOMPUTED_PREFIX
+    characters, which match the most titles) is redone when the date changes.
+    """
+
+    def __init__(self, titles: pd.Series, dates: Optional[pd.Series] = None, today: Optional[date] = None):
+        titles = titles.fillna('').astype(str)
+        forms = titles.map(fuzzy_form)
+        keep = (forms != '').to_numpy()
+        codes, uniques = pd.factorize(forms[keep])
+        # Per airing: its title and its day (NaT for undated lineup rows, which air every week)
+        self._codes = codes.astype(np.int32)
+        if dates is not None:
+            days = pd.to_datetime(dates, errors='coerce')[keep]
+            self._days = days.to_numpy(dtype='datetime64[D]')
+        else:
+            self._days = np.full(len(self._codes), np.datetime64('NaT'), dtype='datetime64[D]')
+
+        self.forms: List[str] = [str(form) for form in uniques]
+        # Spelling of each title as it first appears in the schedule, for display
+        first = pd.Series(np.arange(len(codes))).groupby(codes).first().to_numpy()
+        display = titles[keep].to_numpy()
+        self.titles: List[str] = [str(display[i]) for i in first]
+
+        entries = []
+        for title_id, form in enumerate(self.forms):
+            starts = [0] + [i + 1 for i, ch in enumerate(form) if ch == ' ']
+            entries.extend((form[start:], title_id) for start in starts)
+        entries.sort()
+        self.keys: List[str] = [key for key, _ in entries]
+        self.ids: List[int] = [title_id for _, title_id in entries]
+
+        self.today: Optional[date] = None
+        self.upcoming: List[int] = []
+        self._rank: List[int] = []
+        self._short: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+        self._rerank(today or date.today())
+
+    def _rerank(self, today: date) -> None:
+        upcoming = np.isnat(self._days) | (self._days >= np.datetime64(today, 'D'))
+        counts = np.bincount(self._codes[upcoming], minlength=len(self.forms))
+        order = sorted(range(len(self.forms)), key=lambda i: (-int(counts[i]), self.forms[i]))
+        rank = [0] * len(self.forms)
+        for position, title_id in enumerate(order):
+            rank[title_id] = position
+
+        short: Dict[str, List[int]] = {}
+        for title_id in order:
+            form = self.forms[title_id]
+            for start in [0] + [i + 1 for i, ch in enumerate(form) if ch == ' ']:
+                for length in range(1, min(PRECOMPUTED_PREFIX, len(form) - start) + 1):
+                    best = short.setdefault(form[start:start + length], [])
+                    if len(best) < MAX_SUGGESTIONS and (not best or best[-1] != title_id):
+                        best.append(title_id)
+
+        self.upcoming, self._rank, self._short = counts.tolist(), rank, short
+        self.today = today
+
+    def __len__(self) -> int:
+        return len(self.forms)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the per-airing arrays; the keys grow with distinct titles, not airings."""
+        return self._codes.nbytes + self._days.nbytes
+
+    def _ids(self, prefix: str, k: int) -> List[int]:
+        today = date.today()
+        if today != self.today:
+            with self._lock:
+                if today != self.today:
+                    self._rerank(today)
+        if len(prefix) <= PRECOMPUTED_PREFIX:
+            return self._short.get(prefix, [])[:k]
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\uffff', lo)
+        # The range is small once the prefix is a few characters long
+        return heapq.nsmallest(k, set(self.ids[lo:hi]), key=self._rank.__getitem__)
+
+    def complete(self, prefix: str, k: int = DEFAULT_SUGGESTIONS) -> List[Tuple[str, int]]:
+        """Up to ``k`` (title, upcoming airings) pairs with a word starting with ``prefix``, most airings first."""
+        prefix = fuzzy_form(prefix)
+        if not prefix:
+            return []
+        k = max(0, min(k, MAX_SUGGESTIONS))
+        ids = self._ids(prefix, k)
+        upcoming = self.upcoming
+        return [(self.titles[i], upcoming[i]) for i in ids]
+
+
+def completer_for(store: airing_store.AiringStore) -> TitleCompleter:
+    """The completer for a loaded schedule's store, built once per store."""
+    return schedule_store.derived(store, 'autocomplete', lambda s: TitleCompleter(
+        s.column('Program Title') if 'Program Title' in s.columns else pd.Series(dtype=object),
+        s.column('Date') if 'Date' in s.columns else None))
+
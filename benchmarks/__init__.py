@@ -0,0 +1,10 @@
+"""Synthetic-guide benchmarks for the schedule bot.
+
+    python -m benchmarks.generate --channels 8 --days 90 --titles 5000 --out bench_data
+    python -m benchmarks.run --channels 8 --days 90 --titles 5000 --output before.json
+
+Model timings without LM Studio, against the stand-in server:
+
+    python -m benchmarks.mock_lm_studio --port 1235 --latency lognormal:600,0.5 --error-rate 0.05
+    LM_STUDIO_URL=http://127.0.0.1:1235/v1 python -m benchmarks.run --scenarios llm end_to_end
+"""
@@ -0,0 +1,113 @@
+import argparse
+import os
+import random
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+import add_dates
+from schedule_store import OVERRIDE_FILE, REGULAR_FILE
+
+SYLLABLES = ['ar', 'thur', 'na', 'ture', 'no', 'va', 'ex', 'pe', 'ri', 'ence', 'front', 'line', 'ses', 'a',
+             'me', 'mas', 'ter', 'piece', 'an', 'tique', 'road', 'show', 'cu', 'ri', 'ous', 'george', 'kids',
+             'news', 'hour', 'great', 'lakes', 'mich', 'i', 'gan', 'gar', 'den', 'cook', 'ing', 'his', 'to', 'ry']
+
+
+def make_titles(count: int, seed: int = 0) -> List[str]:
+    """``count`` distinct, plausible-looking program titles."""
+    rng = random.Random(seed)
+    titles, seen = [], set()
+    while len(titles) < count:
+        words = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize()
+                 for _ in range(rng.randint(1, 4))]
+        title = ' '.join(words)
+        if title not in seen:
+            seen.add(title)
+            titles.append(title)
+    return titles
+
+
+def _clock(minutes: np.ndarray) -> List[str]:
+    minutes = minutes % (24 * 60)
+    return [f"{(m // 60) % 12 or 12}:{m % 60:02d} {'AM' if m < 720 else 'PM'}" for m in minutes]
+
+
+def make_lineup(channels: int, titles: List[str], slot_minutes: int = 30, seed: int = 0) -> pd.DataFrame:
+    """A weekly lineup like sample_tv_schedule.xlsx, one Weekday block per day of the week.
+
+    Title popularity is Zipf-distributed. Distinct titles are capped at
+    channels x slots per day x 7.
+    """
+    rng = np.random.default_rng(seed)
+    slots = (24 * 60) // slot_minutes
+    per_week = channels * slots * 7
+    weights = 1.0 / np.arange(1, len(titles) + 1)
+    picks = rng.choice(len(titles), size=per_week, p=weights / weights.sum())
+    # Make sure every title airs somewhere when the week has room for all of them
+    if len(titles) <= per_week:
+        picks[rng.choice(per_week, size=len(titles), replace=False)] = np.arange(len(titles))
+    starts = np.tile(np.arange(slots) * slot_minutes, channels * 7)
+    channel_names = [f"WGVU {i + 1}" if i else "WGVU" for i in range(channels)]
+    return pd.DataFrame({
+        'Program Title': [titles[i] for i in picks],
+        'Channel Name': np.tile(np.repeat(channel_names, slots), 7),
+        'Start Time': _clock(starts),
+        'End Time': _clock(starts + slot_minutes),
+        'Weekday': np.repeat(add_dates.WEEKDAYS, channels * slots),
+    })
+
+
+def make_schedule(lineup: pd.DataFrame, days: int, start_date: date) -> pd.DataFrame:
+    """The dated schedule, expanded with add_dates' cross-join engine."""
+    return pd.concat(add_dates.iter_expanded(lineup, start_date, days), ignore_index=True)
+
+
+def make_overrides(schedule: pd.DataFrame, count: int, seed: int = 0) -> pd.DataFrame:
+    """Special programming over random slots, shaped like create_override.py's sheet."""
+    rng = np.random.default_rng(seed)
+    picks = schedule.iloc[rng.choice(len(schedule), size=min(count, len(schedule)), replace=False)]
+    return pd.DataFrame({
+        'Program Title': [f"Special: {title} Marathon" for title in picks['Program Title']],
+        'Channel Name': picks['Channel Name'].to_numpy(),
+        'Start Time': picks['Start Time'].to_numpy(),
+        'End Time': picks['End Time'].to_numpy(),
+        'Date': pd.to_datetime(picks['Date']).dt.date.to_numpy(),
+    })
+
+
+def generate(channels: int = 4, days: int = 30, titles: int = 1000, overrides: int = 50,
+             slot_minutes: int = 30, start_date: Optional[date] = None, seed: int = 0):
+    """(override_df, regular_df) raw frames, as they would be read from the workbooks."""
+    start_date = start_date or date.today()
+    lineup = make_lineup(channels, make_titles(titles, seed), slot_minutes, seed)
+    regular = make_schedule(lineup, days, start_date)
+    return make_overrides(regular, overrides, seed), regular
+
+
+def write_workbooks(override_df: pd.DataFrame, regular_df: pd.DataFrame, out_dir: str) -> None:
+    """Write both frames under the file names the apps load."""
+    os.makedirs(out_dir, exist_ok=True)
+    override_df.to_excel(os.path.join(out_dir, OVERRIDE_FILE), index=False)
+    add_dates.write_chunks([regular_df], os.path.join(out_dir, REGULAR_FILE))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic program guide.")
+    parser.add_argument('--channels', type=int, default=4)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--titles', type=int, default=1000, help="distinct program titles")
+    parser.add_argument('--overrides', type=int, default=50)
+    parser.add_argument('--slot-minutes', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='bench_data')
+    args = parser.parse_args()
+
+    override_df, regular_df = generate(args.channels, args.days, args.titles, args.overrides,
+                                       args.slot_minutes, seed=args.seed)
+    if len(regular_df) >= 1_048_576:
+        print("❌ Excel sheets hold at most 1,048,576 rows; use fewer channels/days for workbooks.")
+    else:
+        write_workbooks(override_df, regular_df, args.out)
+        print(f"✅ Wrote {len(regular_df)} airings and {len(override_df)} overrides to {args.out}/")
@@ -0,0 +1,282 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+MODEL_NAME = "phi-3.1-mini-128k-instruct"
+
+# Question words around the title in messages like "When is Arthur on tonight?"
+_LEADING = re.compile(
+    r"^(?:(?:when|what time|what day|where|is|are|does|do|will|can i (?:watch|see|catch)|"
+    r"i want to (?:watch|see)|tell me when|show me)\b[\s,]*)+", re.IGNORECASE)
+_TRAILING = re.compile(
+    r"[\s,]*\b(?:on|on tv|airing|playing|showing|coming on|next|tonight|today|tomorrow|this week|"
+    r"going to be on|be on)\b[\s?!.]*$", re.IGNORECASE)
+
+
+def extract_title(message: str) -> str:
+    """The deterministic stand-in for the model: strip the question around the title."""
+    text = message.strip().strip('?!. ')
+    text = _LEADING.sub('', text)
+    while True:
+        stripped = _TRAILING.sub('', text)
+        if stripped == text:
+            break
+        text = stripped
+    return text.strip(' "\'?!.') or message.strip()
+
+
+class LatencyModel:
+    """Per-request generation time, parsed from a spec in milliseconds.
+
+    fixed:300            always 300 ms
+    uniform:200,1200     uniform between 200 and 1200 ms
+    normal:600,150       mean 600 ms, standard deviation 150 ms (never below 0)
+    lognormal:600,0.5    median 600 ms, sigma 0.5: a long right tail like a real model
+    """
+
+    def __init__(self, spec: str):
+        kind, _, args = spec.partition(':')
+        values = [float(v) for v in args.split(',') if v.strip()]
+        expected = {'fixed': 1, 'uniform': 2, 'normal': 2, 'lognormal': 2}
+        if kind not in expected or len(values) != expected[kind]:
+            raise ValueError(f"bad latency spec {spec!r}")
+        self.spec = spec
+        self.kind = kind
+        self.values = values
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds."""
+        if self.kind == 'fixed':
+            ms = self.values[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(*self.values)
+        elif self.kind == 'normal':
+            ms = rng.gauss(*self.values)
+        else:
+            median, sigma = self.values
+            ms = median * rng.lognormvariate(0.0, sigma)
+        return max(ms, 0.0) / 1000
+
+
+class MockLMStudio:
+    """Behaviour and counters shared by every request to one mock server.
+
+    ``slots`` requests are generated at a time, like LM Studio serving one
+    model; the rest queue, and past ``max_queue`` waiting requests are
+    rejected with 503. Each generation takes a sample from ``latency`` plus
+    the answer's tokens at ``tokens_per_second``. A share of requests
+    (``error_rate``) fail with 500, and another share (``hang_rate``) never
+    answer within ``hang_seconds``, so client timeouts can be exercised.
+    The first request, and the first after ``unload_after`` idle seconds,
+    also pays ``cold_seconds``, like a model being loaded back into memory.
+    """
+
+    def __init__(self, latency: LatencyModel, slots: int = 1, max_queue: Optional[int] = None,
+                 tokens_per_second: float = 0.0, error_rate: float = 0.0, hang_rate: float = 0.0,
+                 hang_seconds: float = 300.0, model: str = MODEL_NAME, seed: int = 0,
+                 cold_seconds: float = 0.0, unload_after: float = 300.0):
+        self.latency = latency
+        self.slots = slots
+        self.max_queue = max_queue
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.model = model
+        self.cold_seconds = cold_seconds
+        self.unload_after = unload_after
+        self._last_done: Optional[float] = None
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(slots)
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.counts = {'requests': 0, 'completed': 0, 'errors': 0, 'hung': 0, 'rejected': 0, 'abandoned': 0,
+                       'cold_starts': 0}
+        self.max_waiting = 0
+        self.max_in_flight = 0
+
+    def _draw(self):
+        with self._rng_lock:
+            return self._rng.random(), self.latency.sample(self._rng)
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counts[key] += 1
+
+    def abandoned(self) -> None:
+        self._count('abandoned')
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counts, waiting=self.waiting, in_flight=self.in_flight,
+                        max_waiting=self.max_waiting, max_in_flight=self.max_in_flight,
+                        latency=self.latency.spec, slots=self.slots)
+
+    def complete(self, body: Dict[str, Any]):
+        """(status, payload) for a chat completion request; blocks for the simulated generation."""
+        self._count('requests')
+        roll, delay = self._draw()
+        with self._lock:
+            if self.max_queue is not None and self.waiting >= self.max_queue:
+                self.counts['rejected'] += 1
+                return 503, _error("server busy: request queue is full", 'server_busy')
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+        with self._slots:
+            with self._lock:
+                self.waiting -= 1
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                with self._lock:
+                    now = time.monotonic()
+                    cold = self.cold_seconds > 0 and (self._last_done is None or
+                                                      now - self._last_done > self.unload_after)
+                    if cold:
+                        self.counts['cold_starts'] += 1
+                if cold:
+                    time.sleep(self.cold_seconds)
+                if roll < self.hang_rate:
+                    self._count('hung')
+                    time.sleep(self.hang_seconds)
+                    return None, None
+                if roll < self.hang_rate + self.error_rate:
+                    time.sleep(delay)
+                    self._count('errors')
+                    return 500, _error("injected model failure", 'server_error')
+
+                messages: List[Dict[str, str]] = body.get('messages') or []
+                question = next((m.get('content') or '' for m in reversed(messages) if m.get('role') == 'user'), '')
+                answer = extract_title(question)
+                completion_tokens = len(answer.split()) + 1
+                if self.tokens_per_second > 0:
+                    delay += completion_tokens / self.tokens_per_second
+                time.sleep(delay)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                    self._last_done = time.monotonic()
+
+        self._count('completed')
+        prompt_tokens = sum(len(str(m.get('content') or '').split()) for m in messages)
+        return 200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model') or self.model,
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': answer},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }
+
+
+def _error(message: str, kind: str) -> Dict[str, Any]:
+    return {'error': {'message': message, 'type': kind, 'code': None}}
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible endpoints the bot uses, plus GET /stats for the counters."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out or cancelled while the answer was generated
+            self.server.mock.abandoned()
+            self.close_connection = True
+
+    def do_GET(self):
+        mock: MockLMStudio = self.server.mock
+        if self.path.rstrip('/') == '/v1/models':
+            self._send_json(200, {'object': 'list',
+                                  'data': [{'id': mock.model, 'object': 'model', 'owned_by': 'mock'}]})
+        elif self.path.rstrip('/') == '/stats':
+            self._send_json(200, mock.stats())
+        else:
+            self._send_json(404, _error(f"unknown path {self.path}", 'not_found'))
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            self._send_json(404, _error(f"unknown path {self.path}", 'not_found'))
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, _error("invalid JSON body", 'invalid_request_error'))
+            return
+        status, payload = self.server.mock.complete(body)
+        if status is None:
+            # A hung request: give up without an answer, like a stuck server
+            self.close_connection = True
+            return
+        self._send_json(status, payload)
+
+
+def make_server(mock: MockLMStudio, host: str = '127.0.0.1', port: int = 1234) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), MockRequestHandler)
+    server.daemon_threads = True
+    server.mock = mock
+    return server
+
+
+def start(mock: MockLMStudio, host: str = '127.0.0.1', port: int = 1234) -> ThreadingHTTPServer:
+    """Serve ``mock`` on a daemon thread; returns the server (``shutdown()`` to stop)."""
+    server = make_server(mock, host, port)
+    threading.Thread(target=server.serve_forever, name='mock-lm-studio', daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible LM Studio stand-in for offline benchmarks.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1234)
+    parser.add_argument('--latency', type=LatencyModel, default=LatencyModel('lognormal:600,0.4'),
+                        help="fixed:MS, uniform:MIN,MAX, normal:MEAN,SD or lognormal:MEDIAN,SIGMA (ms)")
+    parser.add_argument('--slots', type=int, default=1, help="requests generated at the same time")
+    parser.add_argument('--max-queue', type=int, help="reject with 503 when this many requests are waiting")
+    parser.add_argument('--tokens-per-second', type=float, default=0.0, help="extra time per answer token")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests that fail with 500")
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="share of requests that never answer")
+    parser.add_argument('--hang-seconds', type=float, default=300.0)
+    parser.add_argument('--cold-ms', type=float, default=0.0, help="extra time for the first request after idling")
+    parser.add_argument('--unload-after', type=float, default=300.0, help="idle seconds before the model goes cold")
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockLMStudio(args.latency, args.slots, args.max_queue, args.tokens_per_second, args.error_rate,
+                        args.hang_rate, args.hang_seconds, args.model, args.seed,
+                        cold_seconds=args.cold_ms / 1000, unload_after=args.unload_after)
+    server = make_server(mock, args.host, args.port)
+    print(f"🤖 Mock LM Studio on http://{args.host}:{args.port}/v1 (latency {args.latency.spec}, "
+          f"{args.slots} slot(s), errors {args.error_rate:.0%}, hangs {args.hang_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
@@ -0,0 +1,268 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import airing_store
+import autocomplete
+import lm_studio
+import query_pipeline
+import schedule_format
+import schedule_store
+import time_index
+import timeline
+from benchmarks import generate
+from llm_cache import PersistentLRUCache
+
+CHATBOT_TEMPLATE = "📺 {title} on {channel}\n🗓️ {date}\n⏰ {start} – {end}"
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        'count': len(ms),
+        'min_ms': round(float(ms.min()), 4),
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'mean_ms': round(float(ms.mean()), 4),
+        'max_ms': round(float(ms.max()), 4),
+    }
+
+
+def timed(fn: Callable[[], object], repeat: int, before: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def timed_each(fn: Callable[[str], object], items: List[str]) -> Dict[str, float]:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def make_queries(regular_df: pd.DataFrame, count: int, seed: int) -> Dict[str, List[str]]:
+    """Title queries drawn with the schedule's own popularity, in a few shapes viewers use."""
+    rng = random.Random(seed)
+    titles = regular_df['Program Title'].sample(count, replace=True, random_state=seed).tolist()
+    first_day = regular_df['Date'].min()
+    horizon = int((regular_df['Date'].max() - first_day).total_seconds() // 60) + 24 * 60
+    return {
+        'times': [first_day + pd.Timedelta(minutes=rng.randrange(horizon)) for _ in titles],
+        'exact': titles,
+        'lowercase_fragment': [t.lower()[:max(3, len(t) // 2)] for t in titles],
+        'miss': [f"zz{rng.randrange(10 ** 6)}" for _ in titles],
+        'chat': [f"When is {t} on?" for t in titles],
+    }
+
+
+def bench_load(override_raw: pd.DataFrame, regular_raw: pd.DataFrame, repeat: int) -> Dict[str, dict]:
+    """load_schedules cold (parse workbooks), from the on-disk snapshot, and from memory."""
+    workdir = tempfile.mkdtemp(prefix='wgvu-bench-')
+    try:
+        generate.write_workbooks(override_raw, regular_raw, workdir)
+        paths = (os.path.join(workdir, schedule_store.OVERRIDE_FILE), os.path.join(workdir, schedule_store.REGULAR_FILE))
+        cache_dir = os.path.join(workdir, schedule_store.CACHE_DIR)
+
+        def cold():
+            schedule_store.forget_loaded()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+        def load():
+            schedule_store.load_schedules(*paths)
+
+        results = {'cold_parse': timed(load, repeat, before=cold)}
+        results['snapshot'] = timed(load, repeat, before=schedule_store.forget_loaded)
+        results['memory'] = timed(load, max(repeat, 20))
+        return results
+    finally:
+        schedule_store.forget_loaded()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def bench_search(override_df: pd.DataFrame, regular_df: pd.DataFrame, queries: Dict[str, List[str]]) -> Dict[str, dict]:
+    started = time.perf_counter()
+    merged = timeline.merged_timeline(override_df, regular_df)
+    store = airing_store.AiringStore(merged)
+    results = {'build_timeline_and_index': summarize([time.perf_counter() - started])}
+    # The merged frame is only measured for comparison: the store is what stays resident
+    frame_bytes = merged.memory_usage(deep=True).sum()
+    del merged
+    time_slots = time_index.index_for(store)
+    completer = autocomplete.completer_for(store)
+    results['airing_store'] = dict(store.stats(),
+                                   frame_bytes_per_airing=round(frame_bytes / max(store.size, 1), 2),
+                                   index_bytes_per_airing=round((time_slots.nbytes + completer.nbytes) / max(store.size, 1), 2))
+    for shape in ('exact', 'lowercase_fragment', 'miss'):
+        results[shape] = timed_each(lambda q: airing_store.search_schedule(q, store), queries[shape])
+    typed = [q[:length] for q in queries['lowercase_fragment'] for length in (1, 3, 6)]
+    results['autocomplete'] = timed_each(completer.complete, typed)
+
+    # "What's on at ...": interval index over the whole timeline
+    results['time_slot_timeline'] = timed_each(lambda when: time_index.airing_at(store, when), queries['times'])
+    return results
+
+
+def bench_format(store: airing_store.AiringStore, queries: Dict[str, List[str]], repeat: int) -> Dict[str, dict]:
+    """format_schedule_result's vectorized replacement, per typical result and for the largest one."""
+    result_sets = [airing_store.search_schedule(q, store)[0] for q in queries['exact']]
+    largest = max(result_sets, key=len)
+    return {
+        'typical_result': timed_each(lambda i: schedule_format.format_airings(result_sets[i], CHATBOT_TEMPLATE),
+                                     list(range(len(result_sets)))),
+        'largest_result': dict(timed(lambda: schedule_format.format_airings(largest, CHATBOT_TEMPLATE), repeat),
+                               airings=len(largest)),
+    }
+
+
+def bench_end_to_end(store: airing_store.AiringStore, queries: Dict[str, List[str]]) -> Dict[str, dict]:
+    """The chatbot's path for a question: extraction, search, formatting and the response string."""
+    def answer(question: str) -> str:
+        result = query_pipeline.run_query(question, store, airing_store.search_schedule)
+        airings = schedule_format.format_airings(result.results, CHATBOT_TEMPLATE)
+        return "".join(f"{airing}\n\n" for airing in airings)
+
+    stats = {'chat_questions': timed_each(answer, queries['chat'])}
+    stats['chat_questions']['extraction_paths'] = lm_studio.extraction_stats()
+    return stats
+
+
+def bench_llm(queries: Dict[str, List[str]], concurrency: int, llm_timeout: float) -> Dict[str, dict]:
+    """Questions that have to reach the model, through run_query's timeout and cancellation.
+
+    Set LM_STUDIO_URL to a benchmarks/mock_lm_studio.py server to run this
+    offline. The first pass asks every question with an empty title cache;
+    the second asks them again and should be answered from the cache.
+    """
+    no_schedule = airing_store.AiringStore(pd.DataFrame())
+
+    def no_search(title, store):
+        return pd.DataFrame(), "None"
+
+    def ask(question: str):
+        started = time.perf_counter()
+        result = query_pipeline.run_query(question, no_schedule, no_search, llm_timeout)
+        return time.perf_counter() - started, result.path
+
+    results = {}
+    saved_cache = lm_studio.title_cache
+    lm_studio.title_cache = PersistentLRUCache(None)
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for name in ('first_pass', 'cached_pass'):
+                started = time.perf_counter()
+                outcomes = list(pool.map(ask, queries['chat']))
+                wall = time.perf_counter() - started
+                stats = summarize([seconds for seconds, _ in outcomes])
+                stats['throughput_qps'] = round(len(outcomes) / wall, 2)
+                stats['paths'] = dict(Counter(path for _, path in outcomes))
+                results[name] = stats
+    finally:
+        lm_studio.title_cache = saved_cache
+    results['llm_url'] = lm_studio.LM_STUDIO_URL
+    results['breaker'] = lm_studio.breaker.state
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run(args) -> dict:
+    override_raw, regular_raw = generate.generate(args.channels, args.days, args.titles, args.overrides,
+                                                  args.slot_minutes, seed=args.seed)
+    override_df = schedule_store.compile_schedule(override_raw)
+    regular_df = schedule_store.compile_schedule(regular_raw)
+    queries = make_queries(regular_df, args.queries, args.seed)
+
+    scenarios = {}
+    if 'load' in args.scenarios:
+        if len(regular_raw) <= args.max_workbook_rows:
+            scenarios['load'] = bench_load(override_raw, regular_raw, args.load_repeat)
+        else:
+            scenarios['load'] = {'skipped': f"{len(regular_raw)} rows is above --max-workbook-rows"}
+    if 'search' in args.scenarios:
+        scenarios['search'] = bench_search(override_df, regular_df, queries)
+    if 'format' in args.scenarios or 'end_to_end' in args.scenarios:
+        store = airing_store.pack(override_df, regular_df)
+        if 'format' in args.scenarios:
+            scenarios['format'] = bench_format(store, queries, args.repeat)
+        if 'end_to_end' in args.scenarios:
+            scenarios['end_to_end'] = bench_end_to_end(store, queries)
+    if 'llm' in args.scenarios:
+        scenarios['llm'] = bench_llm(queries, args.llm_concurrency, args.llm_timeout)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+        },
+        'params': {
+            'channels': args.channels, 'days': args.days, 'titles': args.titles, 'overrides': args.overrides,
+            'slot_minutes': args.slot_minutes, 'queries': args.queries, 'seed': args.seed,
+            'llm_concurrency': args.llm_concurrency, 'llm_timeout': args.llm_timeout,
+            'airings': len(regular_df), 'distinct_titles': int(regular_df['Program Title'].nunique()),
+        },
+        'scenarios': scenarios,
+    }
+
+
+SCENARIOS = ('load', 'search', 'format', 'end_to_end')
+# Needs a model server, so only runs when asked for
+OPTIONAL_SCENARIOS = ('llm',)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the schedule bot on a synthetic guide; prints JSON.")
+    parser.add_argument('--channels', type=int, default=4)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--overrides', type=int, default=50)
+    parser.add_argument('--slot-minutes', type=int, default=30)
+    parser.add_argument('--queries', type=int, default=200, help="queries per search/format/end-to-end scenario")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--load-repeat', type=int, default=3)
+    parser.add_argument('--max-workbook-rows', type=int, default=200_000,
+                        help="skip the workbook load scenario above this many airings")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS + OPTIONAL_SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--llm-concurrency', type=int, default=8, help="parallel questions in the llm scenario")
+    parser.add_argument('--llm-timeout', type=float, default=query_pipeline.LLM_TIMEOUT_SECONDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + "\n")
+        print(f"✅ Wrote benchmark results to {args.output}", file=sys.stderr)
+    else:
+        print(report)
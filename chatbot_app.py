@@ -1,20 +1,37 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from openai import OpenAI
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 from dotenv import load_dotenv
 import os
 
+import airing_store
+import fuzzy_match
+import instrumentation
+import lm_studio
+import query_pipeline
+import response_cache
+import schedule_format
+import schedule_reload
+import time_index
+import timeline
+import title_index
+import title_matcher
+from lm_health import LMStudioUnavailable
+
+# Messages kept per session, messages drawn on each rerun and airings shown per "Show more"
+MAX_HISTORY = 200
+RENDERED_MESSAGES = 20
+AIRINGS_PER_PAGE = 10
+
+# How each airing reads in a reply, and how one missing its date or times reads
+AIRING_TEMPLATE = "📺 {title} on {channel}\n🗓️ {date}\n⏰ {start} – {end}"
+AIRING_FALLBACK = "📺 {title} on {channel}"
+
 # Load environment variables
 load_dotenv()
 
-# Initialize OpenAI client with LM Studio
-client = OpenAI(
-    base_url="http://127.0.0.1:1234/v1",
-    api_key="not-needed"  # LM Studio doesn't need an API key
-)
-
 # Set page config
 st.set_page_config(
     page_title="WGVU TV Schedule Assistant",
@@ -47,88 +64,133 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-def load_schedules() -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame]]:
-    """Load both schedule files and handle errors."""
+def load_schedules() -> Optional[schedule_reload.ScheduleSnapshot]:
+    """Load both schedule files and handle errors.
+
+    Returns the live snapshot kept by the background reloader, so a new
+    override file is picked up without stalling this rerun.
+    """
     try:
-        override_df = pd.read_excel('schedule_override.xlsx')
-        regular_df = pd.read_excel('sample_tv_schedule_with_dates.xlsx')
-        return override_df, regular_df
+        with instrumentation.span('schedule_load'):
+            return schedule_reload.current()
     except FileNotFoundError as e:
         st.error("Error: Could not find schedule files. Please make sure both schedule files exist.")
-        return None, None
+        return None
 
 def test_lm_studio_connection():
-    """Test if LM Studio is accessible."""
-    try:
-        response = client.chat.completions.create(
-            model="phi-3.1-mini-128k-instruct",
-            messages=[
-                {"role": "system", "content": "Test connection"},
-                {"role": "user", "content": "Test"}
-            ],
-            max_tokens=5
-        )
-        return True
-    except Exception as e:
-        st.error(f"❌ Cannot connect to LM Studio: {str(e)}")
+    """Report whether LM Studio is accessible, from the background health probe.
+
+    The probe runs on its own thread, so this never waits on the network.
+    Returns True until the first probe has finished.
+    """
+    with instrumentation.span('connection_check'):
+        lm_studio.health.ensure_started()
+        lm_studio.warmer.ensure_started()
+        status = lm_studio.health.status()
+    if status.ok is False:
+        st.error(f"❌ Cannot connect to LM Studio: {status.error}")
         return False
+    if lm_studio.gateway.saturated:
+        # New questions are answered from a search of their exact words until the queue drains
+        st.info("⏳ Lots of viewers are asking right now, so answers may be a little less precise.")
+    return True
 
-def extract_show_title(query: str) -> str:
-    """Use LM Studio to extract the show title from the user's query."""
+def extract_show_title(query: str, *schedules: airing_store.AiringStore) -> str:
+    """Extract the show title from the user's query, only asking LM Studio when no known title is named."""
     try:
-        response = client.chat.completions.create(
-            model="phi-3.1-mini-128k-instruct",
-            messages=[
-                {"role": "system", "content": "Extract ONLY the TV show title from the user's message. Respond with ONLY the show title. No explanation. No reasoning. Just the title."},
-                {"role": "user", "content": query}
-            ],
-            max_tokens=50,
-            temperature=0.1
-        )
-        return response.choices[0].message.content.strip()
+        return lm_studio.extract_show_title(query, *schedules)
+    except LMStudioUnavailable:
+        # Already reported by the connection check; search the raw question instead
+        return query
     except Exception as e:
         st.error(f"❌ Error with LM Studio: {str(e)}")
         return query
 
-def search_schedule(title: str, override_df: pd.DataFrame, regular_df: pd.DataFrame) -> Tuple[pd.DataFrame, str]:
-    """Search for a show in both schedules."""
-    title = title.lower()
-    
-    # Search in override schedule
-    override_matches = override_df[override_df['Program Title'].fillna('').str.lower().str.contains(title)]
-    if not override_matches.empty:
-        return override_matches, "Override"
-    
-    # Search in regular schedule
-    regular_matches = regular_df[regular_df['Program Title'].fillna('').str.lower().str.contains(title)]
-    if not regular_matches.empty:
-        return regular_matches, "Regular"
-    
+def search_time_slot(when: datetime, store: airing_store.AiringStore,
+                     channel: Optional[str] = None, title: Optional[str] = None) -> Tuple[pd.DataFrame, str]:
+    """Find what's on the air at a given time, optionally on one channel or of one show."""
+    with instrumentation.span('time_slot_search'):
+        matches = time_index.airing_at(store, when, channel)
+        if title is not None and not matches.empty:
+            titles = matches['Program Title'].astype(str).map(title_index.normalize_title)
+            matches = matches[titles == title_index.normalize_title(title)]
+    if not matches.empty:
+        return matches, timeline.source_label(matches)
     return pd.DataFrame(), "None"
 
+def format_schedule_results(results: pd.DataFrame) -> List[str]:
+    """Format every schedule result into a readable string in one vectorized pass."""
+    with instrumentation.span('format'):
+        return schedule_format.format_airings(results, AIRING_TEMPLATE, fallback=AIRING_FALLBACK)
+
 def format_schedule_result(row: pd.Series) -> str:
     """Format a single schedule result into a readable string."""
-    try:
-        date = pd.to_datetime(row['Date']).strftime("%A, %B %d")
-        start = pd.to_datetime(str(row['Start Time'])).strftime("%I:%M %p")
-        end = pd.to_datetime(str(row['End Time'])).strftime("%I:%M %p")
-        
-        return (f"📺 {row['Program Title']} on {row['Channel Name']}\n"
-                f"🗓️ {date}\n"
-                f"⏰ {start} – {end}")
-    except Exception as e:
-        st.error(f"Error formatting schedule: {str(e)}")
-        return f"📺 {row['Program Title']} on {row['Channel Name']}"
+    return format_schedule_results(row.to_frame().T)[0]
+
+def add_message(message: dict) -> None:
+    """Append to the chat history, dropping the oldest messages past MAX_HISTORY."""
+    message['id'] = st.session_state.next_message_id
+    st.session_state.next_message_id += 1
+    st.session_state.messages.append(message)
+    del st.session_state.messages[:-MAX_HISTORY]
+
+def results_message(title: str, results: pd.DataFrame, snapshot: schedule_reload.ScheduleSnapshot) -> dict:
+    """A chat message that refers to the matched airings instead of holding their text.
+
+    ``airings`` are positions in the snapshot's airing store (the index
+    airing_store.search_schedule returns) and ``title_ids`` the store's codes for the
+    matched titles; both are only meaningful for ``version``.
+    """
+    positions = results.index.to_numpy(dtype=np.int32)
+    store = snapshot.store
+    return {"role": "assistant", "title": title, "title_ids": store.title_ids(positions).tolist(),
+            "airings": positions, "version": snapshot.version, "shown": AIRINGS_PER_PAGE}
+
+def message_airings(message: dict, snapshot: schedule_reload.ScheduleSnapshot) -> np.ndarray:
+    """The message's airing positions in the current snapshot, searching again after a reload."""
+    if message["version"] != snapshot.version:
+        store = snapshot.store
+        message["airings"] = store.search(message["title"])
+        message["title_ids"] = store.title_ids(message["airings"]).tolist() if len(message["airings"]) else []
+        message["version"] = snapshot.version
+    return message["airings"]
+
+def render_message(message: dict, snapshot: schedule_reload.ScheduleSnapshot) -> None:
+    """Draw one chat message; result messages format only the airings shown so far."""
+    if "airings" not in message:
+        st.write(message["content"])
+        return
+    positions = message_airings(message, snapshot)
+    total = len(positions)
+    if not total:
+        st.write(f"The schedule has changed and {message['title']} is no longer listed. "
+                 "Would you like to try searching for a different show?")
+        return
+    shown = min(message["shown"], total)
+    response = f"Great news! I found {total} airing{'s' if total > 1 else ''} of {message['title']}:\n\n"
+    # Only the page shown is decoded, as lightweight records rather than a frame
+    with instrumentation.span('format'):
+        page = snapshot.store.records(positions[:shown])
+        response += "".join(f"{airing.format(AIRING_TEMPLATE, AIRING_FALLBACK)}\n\n" for airing in page)
+    if shown < total:
+        st.write(response)
+        if st.button(f"Show more ({total - shown} more)", key=f"more-{message['id']}"):
+            message["shown"] = shown + AIRINGS_PER_PAGE
+            st.rerun()
+    else:
+        st.write(response + "Hope this helps! Let me know if you'd like to know about any other shows.")
 
 def main():
     # Initialize session state for chat history
     if 'messages' not in st.session_state:
         st.session_state.messages = []
+    if 'next_message_id' not in st.session_state:
+        st.session_state.next_message_id = 0
     
-    # Test LM Studio connection
+    # Check LM Studio connection (cached status; searches still work on the raw question while it's down)
     if not test_lm_studio_connection():
-        st.error("⚠️ LM Studio is not responding. Please make sure it's running and try again.")
-        return
+        st.warning("⚠️ LM Studio is not responding, so I'll search for your exact words. "
+                   "Please make sure it's running for smarter answers.")
     
     # Header
     st.title("📺 WGVU TV Schedule Assistant")
@@ -140,25 +202,59 @@ def main():
         - "Show me the schedule for Nature"
     """)
     
+    # Title extraction counters
+    cache_stats = lm_studio.title_cache.stats()
+    extraction_stats = lm_studio.extraction_stats()
+    st.sidebar.caption(f"Known-title matches: {extraction_stats['known_title']} "
+                       f"({extraction_stats['known_title_rate']:.0%} of queries, "
+                       f"{extraction_stats['model_bypass_rate']:.0%} answered without the model)")
+    st.sidebar.caption(f"Title cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                       f"({cache_stats['hit_rate']:.0%} hit rate)")
+    warmup_stats = lm_studio.warmer.stats()
+    if warmup_stats['cold_ms'] is not None:
+        st.sidebar.caption(f"Model warm-up: {warmup_stats['cold_ms']:.0f} ms cold, "
+                           f"{warmup_stats['warm_ms'] or 0:.0f} ms warm, {warmup_stats['keepalives']} keep-alives")
+    gateway_stats = lm_studio.gateway.stats()
+    st.sidebar.caption(f"LM Studio: {gateway_stats['in_flight']} running, {gateway_stats['waiting']} queued "
+                       f"({gateway_stats['coalesced']} shared, {gateway_stats['shed']} skipped)")
+    
+    # Per-stage latency; also written to SCHEDULE_METRICS_JSONL when that's set
+    instrumentation.metrics.ensure_dumping()
+    with st.sidebar.expander("⏱️ Latency by stage"):
+        stages = instrumentation.metrics.snapshot()['stages']
+        if stages:
+            st.table(pd.DataFrame.from_dict(stages, orient='index')[['count', 'p50_ms', 'p95_ms', 'p99_ms', 'errors']])
+        else:
+            st.caption("No questions answered yet.")
+    
     # Clear chat button
     if st.button("Clear Chat"):
         st.session_state.messages = []
         st.rerun()  # Keep this one as it's needed for clearing the chat
     
     # Load schedules
-    override_df, regular_df = load_schedules()
-    if override_df is None or regular_df is None:
+    snapshot = load_schedules()
+    if snapshot is None:
         st.error("❌ I couldn't load the TV schedules. Please make sure the schedule files are in the correct location.")
         return
+    store = snapshot.store
+    # Answer the most asked-about titles ahead of time, once per schedule version
+    response_cache.ensure_warm(airing_store.search_schedule, store, snapshot.version)
+    memory = snapshot.memory_stats()
+    st.sidebar.caption(f"Schedule: {memory['airings']:,} airings, {memory['bytes'] / 2 ** 20:.1f} MB resident "
+                       f"({memory['bytes_per_airing']:.0f} bytes each, shared by all sessions)")
     
     # Create a container for chat messages
     chat_container = st.empty()
     
-    # Display chat history
+    # Display the most recent messages only, so a rerun costs the same however long the chat gets
     with chat_container.container():
-        for message in st.session_state.messages:
+        hidden = len(st.session_state.messages) - RENDERED_MESSAGES
+        if hidden > 0:
+            st.caption(f"{hidden} earlier message{'s' if hidden > 1 else ''} not shown")
+        for message in st.session_state.messages[-RENDERED_MESSAGES:]:
             with st.chat_message(message["role"]):
-                st.write(message["content"])
+                render_message(message, snapshot)
     
     # Chat input form
     with st.form("chat_form"):
@@ -166,54 +262,68 @@ def main():
         submitted = st.form_submit_button("Send")
         
         if submitted:
-            st.write("Debug - Form submitted")  # Debug info
-            st.write("Debug - User input:", user_input)  # Debug info
-            
             if user_input:
                 # Add user message to chat history
-                st.session_state.messages.append({"role": "user", "content": user_input})
-                st.write("Debug - Added user message to history")  # Debug info
+                add_message({"role": "user", "content": user_input})
                 
-                with st.spinner("Let me check the schedule for you..."):
+                with st.spinner("Let me check the schedule for you..."), instrumentation.span('answer'):
                     try:
-                        # Extract show title using LM Studio
-                        show_title = extract_show_title(user_input)
-                        st.write("Debug - Extracted title:", show_title)  # Debug info
+                        # "What's on at 8 tonight?" is answered from the time-slot index, no title needed
+                        when = time_index.parse_time_query(user_input)
+                        if when is not None:
+                            channel = time_index.find_channel(user_input, store)
+                            # "Is NOVA on at 8?" names a show: only its airings in the slot answer it
+                            slot_title = title_matcher.match_title(user_input, store)
+                            results, source = search_time_slot(when, store, channel, slot_title)
+                            slot = f"at {when.strftime('%I:%M %p')} on {when.strftime('%A, %B %d')}"
+                            slot = f"on {channel} {slot}" if channel else slot
+                            if not results.empty:
+                                if slot_title is not None:
+                                    response = f"Yes! {slot_title} is {slot}:\n\n" if channel else f"Yes! {slot_title} is on {slot}:\n\n"
+                                else:
+                                    response = f"Here's what's on {slot}:\n\n" if not channel else f"Here's what's {slot}:\n\n"
+                                response += "".join(f"{airing}\n\n" for airing in format_schedule_results(results))
+                                response += "Hope this helps! Let me know if you'd like to know about any other shows."
+                            elif slot_title is not None:
+                                # Not on then: say so, then answer with when it is on below
+                                add_message({"role": "assistant",
+                                             "content": f"I couldn't find {slot_title} scheduled {slot}."})
+                            else:
+                                response = f"I couldn't find anything scheduled {slot}. Would you like to try a different time?"
+                            if not results.empty or slot_title is None:
+                                add_message({"role": "assistant", "content": response})
+                                st.rerun()
                         
-                        # Search schedules
-                        results, source = search_schedule(show_title, override_df, regular_df)
-                        st.write("Debug - Found matches:", len(results))  # Debug info
-                        st.write("Debug - Source:", source)  # Debug info
+                        # Extract the show title with LM Studio while searching the raw question in parallel
+                        search = response_cache.cached_search(airing_store.search_schedule, snapshot.version)
+                        query = query_pipeline.run_query(user_input, store, search,
+                                                         raw_search=airing_store.search_schedule)
+                        if query.error is not None and not isinstance(query.error, LMStudioUnavailable):
+                            st.error(f"❌ Error with LM Studio: {str(query.error) or 'request timed out'}")
+                        show_title, results = query.title, query.results
                         
-                        # Prepare response
+                        # Found airings are stored by reference and formatted a page at a time when drawn
                         if not results.empty:
-                            response = f"Great news! I found {len(results)} airing{'s' if len(results) > 1 else ''} of {show_title}:\n\n"
-                            for _, row in results.iterrows():
-                                response += format_schedule_result(row) + "\n\n"
-                            response += "Hope this helps! Let me know if you'd like to know about any other shows."
+                            add_message(results_message(show_title, results, snapshot))
                         else:
                             response = f"I couldn't find any upcoming airings of {show_title}. "
+                            suggestions = fuzzy_match.suggest_titles(show_title, store)
+                            if suggestions:
+                                response += f"Did you mean {' or '.join(suggestions[:3])}? "
                             response += "Would you like to try searching for a different show? I'm here to help!"
-                        
-                        st.write("Debug - Response:", response)  # Debug info
-                        
-                        # Add assistant response to chat history
-                        st.session_state.messages.append({"role": "assistant", "content": response})
-                        st.write("Debug - Added assistant response to history")  # Debug info
+                            add_message({"role": "assistant", "content": response})
                         
                         # Force a refresh to show the new messages
                         st.rerun()
                         
                     except Exception as e:
                         st.error(f"❌ I encountered an error while searching: {str(e)}")
-                        st.write("Debug - Error:", str(e))  # Debug info
-                        st.session_state.messages.append({
+                        instrumentation.increment('answer_errors')
+                        add_message({
                             "role": "assistant",
                             "content": "I'm sorry, I ran into a problem. Could you please try asking again?"
                         })
                         st.rerun()  # Force a refresh to show the error message
-            else:
-                st.write("Debug - No user input provided")  # Debug info
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
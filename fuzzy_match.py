@@ -0,0 +1,133 @@
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+import airing_store
+import schedule_store
+import title_index
+
+# Hard cap on the time one "did you mean" lookup may take
+DEFAULT_BUDGET_SECONDS = 0.05
+# Candidates that survive the trigram filter and get an edit-distance check
+MAX_CANDIDATES = 64
+
+_PUNCTUATION = re.compile(r'[^\w\s]+')
+_SPACES = re.compile(r'\s+')
+
+
+def fuzzy_form(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _PUNCTUATION.sub(' ', str(text).lower())
+    return _SPACES.sub(' ', text).strip()
+
+
+def _padded_grams(text: str) -> Set[str]:
+    # Padding each word makes short words ("artur") share their edges with the real title
+    padded = f" {text.replace(' ', '  ')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between ``a`` and ``b``, or ``limit + 1`` once it must exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if current[j] < row_min:
+                row_min = current[j]
+        if row_min > limit:
+            return limit + 1
+        previous = current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def max_typos(query: str) -> int:
+    """How many edits a query of this length may be off by and still count as a match."""
+    return max(1, len(query) // 4)
+
+
+class FuzzyMatcher:
+    """Typo-tolerant lookup over the distinct titles of one TitleIndex.
+
+    A padded-trigram overlap count picks a bounded set of candidates, then a
+    bounded edit distance against the whole title and against each run of
+    words as long as the query verifies them.
+    """
+
+    def __init__(self, index: title_index.TitleIndex):
+        self.display_titles = index.display_titles
+        self.forms: List[str] = [fuzzy_form(title) for title in index.titles]
+        self.words: List[List[str]] = [form.split(' ') for form in self.forms]
+        self.grams: Dict[str, List[int]] = {}
+        for title_id, form in enumerate(self.forms):
+            for gram in _padded_grams(form):
+                self.grams.setdefault(gram, []).append(title_id)
+
+    def _distance(self, query: str, title_id: int, limit: int) -> int:
+        best = bounded_distance(query, self.forms[title_id], limit)
+        width = query.count(' ') + 1
+        words = self.words[title_id]
+        for start in range(len(words) - width + 1):
+            if best == 0:
+                break
+            window = ' '.join(words[start:start + width])
+            best = min(best, bounded_distance(query, window, min(best, limit)))
+        return best
+
+    def matches(self, query: str, deadline: float) -> List[Tuple[int, int, str]]:
+        """(distance, -overlap, title) for each verified candidate found before ``deadline``."""
+        query = fuzzy_form(query)
+        if not query:
+            return []
+
+        overlap: Counter = Counter()
+        for gram in _padded_grams(query):
+            overlap.update(self.grams.get(gram, ()))
+            if time.perf_counter() > deadline:
+                break
+
+        limit = max_typos(query)
+        found = []
+        for title_id, shared in overlap.most_common(MAX_CANDIDATES):
+            if time.perf_counter() > deadline:
+                break
+            distance = self._distance(query, title_id, limit)
+            if distance <= limit:
+                found.append((distance, -shared, self.display_titles[title_id]))
+        return found
+
+
+def matcher_for(store: airing_store.AiringStore) -> FuzzyMatcher:
+    """The fuzzy matcher for a loaded schedule's store, built once per store."""
+    return schedule_store.derived(store, 'fuzzy_matcher', lambda s: FuzzyMatcher(s.title_index))
+
+
+def suggest_titles(query: str, *schedules: airing_store.AiringStore, limit: int = 5,
+                   budget: float = DEFAULT_BUDGET_SECONDS) -> List[str]:
+    """Ranked "did you mean" titles for a query that found nothing.
+
+    Whatever has been verified when ``budget`` seconds run out is returned,
+    so a lookup never holds up a response. The budget starts once the
+    schedules' matchers are built, so a first lookup still gets answers.
+    """
+    # Build (or fetch) the indexes first: the budget is for matching, not a store's first build
+    matchers = [matcher_for(store) for store in schedules if store is not None and store.size]
+    deadline = time.perf_counter() + budget
+    found = []
+    for matcher in matchers:
+        found.extend(matcher.matches(query, deadline))
+
+    suggestions: List[str] = []
+    seen = set()
+    for _, _, title in sorted(found):
+        if title.lower() not in seen:
+            seen.add(title.lower())
+            suggestions.append(title)
+        if len(suggestions) == limit:
+            break
+    return suggestions
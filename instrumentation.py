@@ -0,0 +1,180 @@
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Bucket upper bounds in seconds: ten per decade from 10 µs to 100 s, so
+# quantiles estimated from the buckets are within about 12% of the truth
+BUCKETS: List[float] = [round(10 ** (exponent / 10), 12) for exponent in range(-50, 21)]
+
+# Set SCHEDULE_METRICS_JSONL to append a snapshot to that file every interval
+DUMP_PATH = os.getenv('SCHEDULE_METRICS_JSONL')
+DUMP_SECONDS = float(os.getenv('SCHEDULE_METRICS_INTERVAL', '60'))
+
+
+class Histogram:
+    """Latency histogram with fixed buckets: constant memory and a bisect per observation."""
+
+    def __init__(self, bounds: List[float] = BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                estimate = lower + (upper - lower) * (rank - seen) / n
+                return min(max(estimate, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class Metrics:
+    """Per-stage latency histograms and named counters for one process.
+
+    Wrap a stage in ``span(name)``; an Exception inside the span is counted
+    as an error for that stage and re-raised. Recording takes a lock and a
+    bisect, a few microseconds, so spans can stay on in production.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._dump_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def observe(self, stage: str, seconds: float, error: bool = False) -> None:
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+            if error:
+                self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    @contextmanager
+    def span(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            # Control-flow exceptions such as Streamlit's rerun aren't errors
+            self.observe(stage, time.perf_counter() - started, error=failed)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Record the current value of something that goes up and down, like a queue's depth."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def snapshot(self) -> Dict[str, dict]:
+        """{'stages': {stage: count, errors, p50/p95/p99/mean/max in ms}, 'counters': {...}, 'gauges': {...}}."""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': h.count,
+                    'errors': self._errors.get(stage, 0),
+                    'p50_ms': round(h.quantile(0.50) * 1000, 3),
+                    'p95_ms': round(h.quantile(0.95) * 1000, 3),
+                    'p99_ms': round(h.quantile(0.99) * 1000, 3),
+                    'mean_ms': round(h.sum / h.count * 1000, 3) if h.count else 0.0,
+                    'max_ms': round(h.max * 1000, 3),
+                }
+                for stage, h in sorted(self._stages.items())
+            }
+            return {'stages': stages, 'counters': dict(sorted(self._counters.items())),
+                    'gauges': dict(sorted(self._gauges.items()))}
+
+    def prometheus_text(self, prefix: str = 'schedule_bot') -> str:
+        """The metrics in Prometheus' text exposition format."""
+        lines = [f"# HELP {prefix}_stage_seconds Time spent in each stage of answering a question.",
+                 f"# TYPE {prefix}_stage_seconds histogram"]
+        with self._lock:
+            for stage, h in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, n in zip(h.bounds, h.counts):
+                    cumulative += n
+                    lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+                lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.9f}')
+                lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+            lines += [f"# HELP {prefix}_stage_errors_total Stages that ended with an exception.",
+                      f"# TYPE {prefix}_stage_errors_total counter"]
+            lines += [f'{prefix}_stage_errors_total{{stage="{stage}"}} {self._errors.get(stage, 0)}'
+                      for stage in sorted(self._stages)]
+            for name, value in sorted(self._counters.items()):
+                lines += [f"# TYPE {prefix}_{name}_total counter", f"{prefix}_{name}_total {value}"]
+            for name, value in sorted(self._gauges.items()):
+                lines += [f"# TYPE {prefix}_{name} gauge", f"{prefix}_{name} {value:g}"]
+        return "\n".join(lines) + "\n"
+
+    def dump_jsonl(self, path: str) -> None:
+        """Append one timestamped snapshot line to ``path``."""
+        line = json.dumps(dict(self.snapshot(), timestamp=time.time(), pid=os.getpid()))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+    def _run_dump(self, path: str, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.dump_jsonl(path)
+            except OSError:
+                pass
+
+    def ensure_dumping(self, path: Optional[str] = DUMP_PATH, interval: float = DUMP_SECONDS) -> None:
+        """Start the periodic JSONL dump once per process, if a path is configured."""
+        if not path:
+            return
+        with self._lock:
+            if self._dump_thread is None or not self._dump_thread.is_alive():
+                self._stop.clear()
+                self._dump_thread = threading.Thread(target=self._run_dump, args=(path, interval),
+                                                     name='metrics-dump', daemon=True)
+                self._dump_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# Shared by every session in the process
+metrics = Metrics()
+
+
+def span(stage: str):
+    """Time a stage in the shared registry: ``with instrumentation.span('search'): ...``."""
+    return metrics.span(stage)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    metrics.increment(name, amount)
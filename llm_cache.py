@@ -0,0 +1,125 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+
+class PersistentLRUCache:
+    """Thread-safe LRU cache with a TTL, mirrored to a JSON file.
+
+    One instance is meant to be shared by every session in the process.
+    Entries are reloaded from ``path`` at startup so a restart doesn't begin
+    cold. Inserts only mark the cache dirty; a background thread rewrites
+    the file (atomically) at most every ``flush_seconds``, and once more at
+    exit, so ``put`` never waits on the disk.
+    """
+
+    def __init__(self, path: Optional[str], max_entries: int = 5000, ttl: float = 7 * 24 * 3600,
+                 flush_seconds: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_seconds = flush_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._flusher: Optional[threading.Thread] = None
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    def _load(self) -> None:
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for key, stored_at, value in rows[-self.max_entries:]:
+            if now - stored_at < self.ttl:
+                self._entries[key] = (stored_at, value)
+
+    def flush(self) -> None:
+        """Write the entries to ``path`` now if anything changed since the last write."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            rows = [[key, stored_at, value] for key, (stored_at, value) in self._entries.items()]
+            self._dirty = False
+        # Serialized outside the cache lock, so lookups and inserts carry on meanwhile
+        with self._write_lock:
+            self._write(rows)
+
+    def _write(self, rows: list) -> None:
+        try:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(rows, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The in-memory cache still works if the disk copy can't be written
+            pass
+
+    def _run_flusher(self) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def _mark_dirty(self) -> None:
+        # Called with the lock held
+        self._dirty = True
+        if self.path and self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name='llm-cache-flush', daemon=True)
+            self._flusher.start()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._mark_dirty()
+
+    def values(self) -> List[str]:
+        """Every live value, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [value for stored_at, value in self._entries.values() if now - stored_at < self.ttl]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+            self._mark_dirty()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
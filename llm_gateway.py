@@ -0,0 +1,111 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+import instrumentation
+from lm_health import LMStudioUnavailable
+
+
+class LMStudioBusy(LMStudioUnavailable):
+    """Raised instead of queueing a request when the gateway's queue is full."""
+
+
+class LLMGateway:
+    """The one way model requests reach LM Studio from this process.
+
+    Identical requests in flight at the same time share a single call
+    (single-flight): later callers wait on the first one's result. At most
+    ``max_concurrent`` calls run at once; up to ``max_queue`` more wait for a
+    slot, and past that a new request fails at once with LMStudioBusy, which
+    callers already treat like a down server and answer without the model.
+
+    All methods run on one event loop (lm_studio's), so no locking is
+    needed; ``stats`` may be read from any thread.
+    """
+
+    def __init__(self, max_concurrent: int = 2, max_queue: int = 32):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.in_flight = 0
+        self.counts = {'requests': 0, 'calls': 0, 'coalesced': 0, 'shed': 0}
+        self.max_waiting = 0
+        self.last_call_at = 0.0  # time.monotonic() when the last call finished
+        self._slots = None  # created on the loop that uses it
+        self._pending: Dict[Hashable, List] = {}  # key -> [task, callers waiting on it]
+
+    def _gauges(self) -> None:
+        instrumentation.metrics.set_gauge('llm_queue_depth', self.waiting)
+        instrumentation.metrics.set_gauge('llm_in_flight', self.in_flight)
+
+    async def _call(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        queued_at = time.perf_counter()
+        acquired = False
+        try:
+            await self._slots.acquire()
+            acquired = True
+        finally:
+            self.waiting -= 1
+            if acquired:
+                self.in_flight += 1
+            self._gauges()
+        instrumentation.metrics.observe('llm_queue_wait', time.perf_counter() - queued_at)
+        try:
+            with instrumentation.span('llm_request'):
+                return await make_call()
+        finally:
+            self.in_flight -= 1
+            self.last_call_at = time.monotonic()
+            self._slots.release()
+            self._gauges()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        entry = self._pending.get(key)
+        if entry is not None and entry[0] is task:
+            del self._pending[key]
+
+    async def request(self, key: Hashable, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        """The result of ``make_call()``, shared with any caller already waiting on ``key``.
+
+        Cancelling a caller only cancels the underlying call once every
+        caller waiting on it has gone.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        self.counts['requests'] += 1
+        entry = self._pending.get(key)
+        if entry is not None:
+            self.counts['coalesced'] += 1
+            instrumentation.increment('llm_coalesced')
+        else:
+            if self.saturated:
+                self.counts['shed'] += 1
+                instrumentation.increment('llm_shed')
+                raise LMStudioBusy(f"LM Studio is busy ({self.waiting} requests queued); skipping the request")
+            self.counts['calls'] += 1
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            self._gauges()
+            task = asyncio.ensure_future(self._call(make_call))
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+            entry = self._pending[key] = [task, 0]
+
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Nobody is waiting for the answer any more
+                task.cancel()
+
+    @property
+    def saturated(self) -> bool:
+        """True while new requests are being shed."""
+        # Requests that haven't started yet may still be headed for a free slot
+        return self.waiting >= self.max_queue + max(self.max_concurrent - self.in_flight, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counts, waiting=self.waiting, in_flight=self.in_flight, max_waiting=self.max_waiting,
+                    max_concurrent=self.max_concurrent, max_queue=self.max_queue)
@@ -0,0 +1,120 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+class LMStudioUnavailable(Exception):
+    """Raised instead of calling LM Studio while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Stop sending requests to a server that keeps failing.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    ``allow`` returns False until ``reset_timeout`` seconds have passed. It
+    then lets a single trial request through (half-open); a success closes
+    the breaker again, a failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 15.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_abandoned(self) -> None:
+        """A request was cancelled before it finished; free the half-open trial slot."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+@dataclass(frozen=True)
+class HealthStatus:
+    ok: Optional[bool]  # None until the first probe finishes
+    checked_at: float = 0.0
+    latency: float = 0.0
+    error: str = ''
+
+
+class HealthMonitor:
+    """Probe LM Studio on a background thread and keep the latest status.
+
+    ``status`` just returns the last result, so callers on the request path
+    never wait on the network. The probe is a cheaper call than a chat
+    completion and can succeed while completions fail, so its results are
+    only reported here and never open or close the request breaker; only
+    completions (including the breaker's half-open trial) do that.
+    """
+
+    def __init__(self, probe: Callable[[], object], interval: float = 10.0):
+        self.probe = probe
+        self.interval = interval
+        self._status = HealthStatus(ok=None)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def status(self) -> HealthStatus:
+        return self._status
+
+    def check_now(self) -> HealthStatus:
+        """Run one probe on the calling thread and publish its result."""
+        started = time.perf_counter()
+        try:
+            self.probe()
+        except Exception as e:
+            self._status = HealthStatus(ok=False, checked_at=time.time(),
+                                        latency=time.perf_counter() - started, error=str(e))
+        else:
+            self._status = HealthStatus(ok=True, checked_at=time.time(), latency=time.perf_counter() - started)
+        return self._status
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.check_now()
+            self._stop.wait(self.interval)
+
+    def ensure_started(self) -> None:
+        """Start the probe thread once per process."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='lm-studio-health', daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,222 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from openai import AsyncOpenAI, OpenAI
+
+import airing_store
+import instrumentation
+import title_matcher
+from llm_cache import PersistentLRUCache
+from llm_gateway import LLMGateway
+from lm_health import CircuitBreaker, HealthMonitor, LMStudioUnavailable
+from lm_warmup import ModelWarmer
+
+# Point at benchmarks/mock_lm_studio.py (or another server) with LM_STUDIO_URL
+LM_STUDIO_URL = os.getenv('LM_STUDIO_URL', "http://127.0.0.1:1234/v1")
+MODEL_NAME = "phi-3.1-mini-128k-instruct"
+TITLE_PROMPT = ("Extract ONLY the TV show title from the user's message. Respond with ONLY the show title. "
+                "No explanation. No reasoning. Just the title.")
+
+# Cached titles are only reused for the same model and the same prompt wording
+PROMPT_VERSION = hashlib.sha1(f"{MODEL_NAME}\n{TITLE_PROMPT}".encode('utf-8')).hexdigest()[:12]
+
+# Initialize OpenAI client with LM Studio
+client = OpenAI(
+    base_url=LM_STUDIO_URL,
+    api_key="not-needed"  # LM Studio doesn't need an API key
+)
+
+# Async twin used for requests that may be cancelled part-way (see submit_title_request)
+async_client = AsyncOpenAI(
+    base_url=LM_STUDIO_URL,
+    api_key="not-needed"
+)
+
+# Model requests run this many at a time, with this many more queued before new ones are shed
+MAX_CONCURRENT_REQUESTS = int(os.getenv('LM_STUDIO_MAX_CONCURRENT', '2'))
+MAX_QUEUED_REQUESTS = int(os.getenv('LM_STUDIO_MAX_QUEUE', '32'))
+
+# Send a keep-alive after this many idle seconds so the model stays loaded (0: warm up once only)
+KEEPALIVE_SECONDS = float(os.getenv('LM_STUDIO_KEEPALIVE_SECONDS', '120'))
+# A typical viewer question, so warm-up processes the real system prompt
+WARMUP_QUERY = "When is Arthur on?"
+# Loading a model from disk can take a while; past this the warm-up counts as failed
+WARMUP_TIMEOUT_SECONDS = 120.0
+
+# Fail fast once LM Studio is known to be down instead of waiting on a timeout per request
+breaker = CircuitBreaker(failure_threshold=3, reset_timeout=15.0)
+
+# The probe lists models, which is far cheaper than a chat completion
+health = HealthMonitor(
+    probe=lambda: client.with_options(timeout=3.0, max_retries=0).models.list(),
+    interval=10.0
+)
+
+# Every title request from every session goes through here (see submit_title_request)
+gateway = LLMGateway(max_concurrent=MAX_CONCURRENT_REQUESTS, max_queue=MAX_QUEUED_REQUESTS)
+
+# Start alongside the health probe so the first real question doesn't pay the model's cold start
+warmer = ModelWarmer(send=lambda max_tokens: send_warmup(max_tokens), last_activity=lambda: gateway.last_call_at,
+                     interval=KEEPALIVE_SECONDS)
+
+# Shared by every session in the process and persisted across restarts
+title_cache = PersistentLRUCache('.llm_title_cache.json', max_entries=5000, ttl=7 * 24 * 3600)
+
+# How an extraction was answered: a known title in the question, the cache, a
+# search of the raw question (query_pipeline), the model, or a fallback after the model failed
+EXTRACTION_PATHS = ('known_title', 'cache', 'raw_search', 'model', 'fallback')
+_extractions: Counter = Counter()
+_extractions_lock = threading.Lock()
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so repeat questions share a cache entry."""
+    return ' '.join(query.lower().split()).rstrip('?!. ')
+
+
+def _cache_key(query: str) -> str:
+    return f"{PROMPT_VERSION}:{normalize_query(query)}"
+
+
+def _title_messages(query: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": TITLE_PROMPT},
+        {"role": "user", "content": query}
+    ]
+
+
+def request_show_title(query: str, timeout: Optional[float] = None) -> str:
+    """Ask the model for the show title, through the shared gateway.
+
+    Raises LMStudioUnavailable without a network call while the breaker is
+    open, and llm_gateway.LMStudioBusy (a subclass) when the gateway's
+    queue is full; other client errors propagate. After ``timeout`` seconds
+    the request is cancelled and concurrent.futures.TimeoutError raised.
+    """
+    future = submit_title_request(query)
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+async def _complete_async(query: str, max_tokens: int = 50) -> str:
+    if not breaker.allow():
+        raise LMStudioUnavailable("LM Studio is unavailable; skipping the request")
+    try:
+        response = await async_client.chat.completions.create(
+            model=MODEL_NAME,
+            messages=_title_messages(query),
+            max_tokens=max_tokens,
+            temperature=0.1
+        )
+    except asyncio.CancelledError:
+        # Cancelled by the caller, which says nothing about the server's health
+        breaker.record_abandoned()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return response.choices[0].message.content.strip()
+
+
+async def _request_show_title_async(query: str) -> str:
+    title = await _complete_async(query)
+    title_cache.put(_cache_key(query), title)
+    return title
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop that runs cancellable model requests."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='lm-studio-async', daemon=True).start()
+        return _loop
+
+
+def submit_title_request(query: str) -> concurrent.futures.Future:
+    """Start a model extraction in the background.
+
+    Sessions asking the same question at the same time share one request,
+    and requests past the gateway's limits queue or are shed (see
+    llm_gateway.LLMGateway). Cancelling the returned future aborts the HTTP
+    request once no other session is waiting on it, so LM Studio isn't left
+    generating an answer nobody will read. A successful result is added to
+    the cache.
+    """
+    request = gateway.request(_cache_key(query), lambda: _request_show_title_async(query))
+    return asyncio.run_coroutine_threadsafe(request, _event_loop())
+
+
+def send_warmup(max_tokens: int) -> str:
+    """One uncached extraction of WARMUP_QUERY through the gateway, for the warmer."""
+    request = gateway.request(('warmup', time.monotonic()), lambda: _complete_async(WARMUP_QUERY, max_tokens))
+    future = asyncio.run_coroutine_threadsafe(request, _event_loop())
+    try:
+        return future.result(timeout=WARMUP_TIMEOUT_SECONDS)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def count_extraction(path: str) -> None:
+    """Record how one extraction was answered (one of EXTRACTION_PATHS)."""
+    with _extractions_lock:
+        _extractions[path] += 1
+    instrumentation.increment(f"extractions_{path}")
+
+
+def known_or_cached_title(query: str, *schedules: airing_store.AiringStore) -> Optional[Tuple[str, str]]:
+    """(title, path) for ``query`` if it can be answered without the model, else None."""
+    known = title_matcher.match_title(query, *schedules)
+    if known is not None:
+        count_extraction('known_title')
+        return known, 'known_title'
+
+    title = title_cache.get(_cache_key(query))
+    if title is not None:
+        count_extraction('cache')
+        return title, 'cache'
+    return None
+
+
+def extract_show_title(query: str, *schedules: airing_store.AiringStore, timeout: Optional[float] = None) -> str:
+    """Extract the show title from a viewer's question.
+
+    If the question names a title from one of ``schedules`` it is returned
+    without calling the model; otherwise repeats are answered from the cache
+    and only new questions reach LM Studio, waiting at most ``timeout``
+    seconds for it (see request_show_title).
+    """
+    found = known_or_cached_title(query, *schedules)
+    if found is not None:
+        return found[0]
+
+    # The request path adds the answer to the cache
+    title = request_show_title(query, timeout)
+    count_extraction('model')
+    return title
+
+
+def extraction_stats() -> Dict[str, float]:
+    """Counts of how extractions were answered, plus the share that skipped the model."""
+    with _extractions_lock:
+        stats = {path: _extractions[path] for path in EXTRACTION_PATHS}
+    total = sum(stats.values())
+    stats['known_title_rate'] = stats['known_title'] / total if total else 0.0
+    bypassed = stats['known_title'] + stats['cache'] + stats['raw_search']
+    stats['model_bypass_rate'] = bypassed / total if total else 0.0
+    return stats
@@ -0,0 +1,106 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import instrumentation
+
+
+class ModelWarmer:
+    """Keep LM Studio's model loaded and its prompt processed, off the request path.
+
+    At start a representative extraction is sent twice: the first pays
+    whatever loading the server still has to do (cold), the second shows
+    the steady state (warm). After that, whenever no model request has been
+    made for ``interval`` seconds, a keep-alive (the same system prompt,
+    ``keepalive_tokens`` of output) is sent so the model isn't unloaded or
+    its prompt cache dropped while nobody is asking. A failed request marks
+    the model cold again, so the next success is recorded as a cold start.
+
+    ``send(max_tokens)`` makes one request and raises on failure;
+    ``last_activity()`` is the time.monotonic() of the last model request
+    from anywhere in the process. An ``interval`` of 0 warms up once and
+    sends no keep-alives.
+    """
+
+    def __init__(self, send: Callable[[int], object], last_activity: Callable[[], float],
+                 interval: float = 120.0, warmup_tokens: int = 50, keepalive_tokens: int = 1,
+                 retry_seconds: float = 10.0):
+        self.send = send
+        self.last_activity = last_activity
+        self.interval = interval
+        self.warmup_tokens = warmup_tokens
+        self.keepalive_tokens = keepalive_tokens
+        self.retry_seconds = retry_seconds
+        self.warm = False
+        self.cold_seconds: Optional[float] = None
+        self.warm_seconds: Optional[float] = None
+        self.keepalives = 0
+        self.failures = 0
+        self.last_error = ''
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def _timed_send(self, stage: str, max_tokens: int) -> Optional[float]:
+        started = time.perf_counter()
+        try:
+            self.send(max_tokens)
+        except Exception as e:
+            self.warm = False
+            self.failures += 1
+            self.last_error = str(e) or type(e).__name__
+            instrumentation.metrics.observe(stage, time.perf_counter() - started, error=True)
+            return None
+        seconds = time.perf_counter() - started
+        instrumentation.metrics.observe(stage, seconds)
+        return seconds
+
+    def warm_up(self) -> bool:
+        """Send the cold and warm requests on the calling thread; True once the model answered."""
+        cold = self._timed_send('llm_warmup_cold', self.warmup_tokens)
+        if cold is None:
+            return False
+        self.cold_seconds = cold
+        warm = self._timed_send('llm_warmup_warm', self.warmup_tokens)
+        if warm is not None:
+            self.warm_seconds = warm
+        self.warm = True
+        self.last_error = ''
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            if not self.warm:
+                if not self.warm_up():
+                    self._stop.wait(self.retry_seconds)
+                continue
+            if self.interval <= 0:
+                return
+            idle = time.monotonic() - self.last_activity()
+            if idle < self.interval:
+                self._stop.wait(self.interval - idle)
+                continue
+            if self._timed_send('llm_keepalive', self.keepalive_tokens) is not None:
+                self.keepalives += 1
+
+    def ensure_started(self) -> None:
+        """Start the warm-up thread once per process."""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='lm-studio-warmup', daemon=True)
+                self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            'warm': self.warm,
+            'cold_ms': round(self.cold_seconds * 1000, 1) if self.cold_seconds is not None else None,
+            'warm_ms': round(self.warm_seconds * 1000, 1) if self.warm_seconds is not None else None,
+            'keepalives': self.keepalives,
+            'failures': self.failures,
+            'last_error': self.last_error,
+            'interval': self.interval,
+        }
@@ -0,0 +1,86 @@
+import concurrent.futures
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import pandas as pd
+
+import airing_store
+import instrumentation
+import lm_studio
+from title_matcher import MIN_TITLE_LENGTH
+
+SearchFn = Callable[[str, airing_store.AiringStore], Tuple[pd.DataFrame, str]]
+
+# How long to wait for the model before answering from the raw-input search
+LLM_TIMEOUT_SECONDS = float(os.getenv('LM_STUDIO_TIMEOUT', '8'))
+
+# Paths whose title is the viewer's own wording, so their answers are rarely asked for again
+RAW_PATHS = ('raw_search', 'fallback')
+
+# Searches are cheap but run alongside the model request, so keep them off the caller's thread
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix='schedule-search')
+
+
+@dataclass
+class QueryResult:
+    title: str
+    results: pd.DataFrame
+    source: str
+    path: str  # one of lm_studio.EXTRACTION_PATHS
+    error: Optional[Exception] = None
+
+
+def _confident(query: str, results: pd.DataFrame) -> bool:
+    return not results.empty and len(lm_studio.normalize_query(query)) >= MIN_TITLE_LENGTH
+
+
+def _timed_search(search: SearchFn, title: str, store: airing_store.AiringStore) -> Tuple[pd.DataFrame, str]:
+    with instrumentation.span('search'):
+        return search(title, store)
+
+
+def run_query(user_input: str, store: airing_store.AiringStore,
+              search: SearchFn, llm_timeout: float = LLM_TIMEOUT_SECONDS,
+              raw_search: Optional[SearchFn] = None) -> QueryResult:
+    """Answer a viewer's question, racing the model against a search of their exact words.
+
+    Known titles and cached extractions are answered without the model. Otherwise
+    the model request starts in the background while the raw input is searched;
+    a hit there cancels the model request. If the model fails or takes longer
+    than ``llm_timeout`` seconds, the raw-input result is returned instead.
+    ``search`` looks up titles; ``raw_search`` (``search`` if not given) looks
+    up the exact words, so a caching ``search`` can leave those out.
+    """
+    # Timed apart from extract_title, which only covers the model
+    with instrumentation.span('title_lookup'):
+        found = lm_studio.known_or_cached_title(user_input, store)
+    if found is not None:
+        title, path = found
+        results, source = _timed_search(search, title, store)
+        return QueryResult(title, results, source, path)
+
+    started = time.perf_counter()
+    llm_future = lm_studio.submit_title_request(user_input)
+    raw_future = _executor.submit(_timed_search, raw_search or search, user_input, store)
+
+    raw_results, raw_source = raw_future.result()
+    if _confident(user_input, raw_results):
+        llm_future.cancel()
+        lm_studio.count_extraction('raw_search')
+        return QueryResult(user_input, raw_results, raw_source, 'raw_search')
+
+    try:
+        title = llm_future.result(timeout=llm_timeout)
+    except Exception as e:
+        # Includes the timeout; cancelling aborts the request still in flight
+        llm_future.cancel()
+        instrumentation.metrics.observe('extract_title', time.perf_counter() - started, error=True)
+        lm_studio.count_extraction('fallback')
+        return QueryResult(user_input, raw_results, raw_source, 'fallback', error=e)
+
+    instrumentation.metrics.observe('extract_title', time.perf_counter() - started)
+    lm_studio.count_extraction('model')
+    results, source = _timed_search(search, title, store)
+    return QueryResult(title, results, source, 'model')
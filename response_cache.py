@@ -0,0 +1,192 @@
+import sys
+import threading
+from collections import Counter, OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import airing_store
+import instrumentation
+import lm_studio
+import title_index
+
+SearchFn = Callable[[str, airing_store.AiringStore], Tuple[pd.DataFrame, str]]
+
+# Memory the cached answers may use per process, and the largest single answer worth keeping
+MAX_BYTES = 64 * 2 ** 20
+MAX_ENTRY_BYTES = MAX_BYTES // 16
+# How many of the most asked-about titles are answered ahead of time
+WARM_TITLES = 50
+
+
+def _nbytes(value: Any) -> int:
+    """Approximate memory held by a cached answer (frames, arrays and JSON-like payloads)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_nbytes(k) + _nbytes(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+class ResponseCache:
+    """Finished answers for one schedule version, keyed on (kind, lowercased title, day).
+
+    Every lookup names the schedule version it was computed from; the first
+    lookup with a new version (either workbook changed) empties the cache,
+    so a stale answer is never served. The day is part of the key so an
+    answer computed yesterday isn't reused today. Least recently used
+    entries are evicted once the answers together take more than
+    ``max_bytes``; an answer larger than ``max_entry_bytes`` (a search for a
+    fragment that matches much of the schedule, say) is returned but not kept.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, max_entry_bytes: int = MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.nbytes = 0
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[tuple, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, kind: Hashable, title: str) -> tuple:
+        # Only lowercased, like the substring search behind it: 'Jeopardy!' and 'Jeopardy' differ
+        return kind, title_index.normalize_title(title), date.today()
+
+    def _check_version(self, version: str) -> None:
+        # Called with the lock held
+        if version != self.version:
+            if self.version is not None:
+                self.invalidations += 1
+            self._entries.clear()
+            self.nbytes = 0
+            self.version = version
+
+    def get(self, version: str, kind: Hashable, title: str) -> Optional[Any]:
+        key = self._key(kind, title)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        instrumentation.increment('response_cache_hits')
+        return entry[0]
+
+    def put(self, version: str, kind: Hashable, title: str, value: Any) -> None:
+        key = self._key(kind, title)
+        size = _nbytes(value)
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if version != self.version:
+                # Built from a snapshot that has since been replaced
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def get_or_build(self, version: str, kind: Hashable, title: str, build: Callable[[], Any]) -> Any:
+        """The cached answer, or ``build()``'s result, stored for the next asker."""
+        value = self.get(version, kind, title)
+        if value is None:
+            value = build()
+            self.put(version, kind, title, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'version': self.version,
+            }
+
+
+# Shared by every session in the process
+responses = ResponseCache()
+
+_warmed: Optional[str] = None
+_warm_lock = threading.Lock()
+
+
+def cached_search(search: SearchFn, version: str) -> SearchFn:
+    """``search`` answered from the shared cache for schedule ``version``.
+
+    Pass the result to query_pipeline.run_query as its title search, so the
+    search for an extracted title is done once per title, day and schedule
+    version. The search of a viewer's exact words is left uncached: nearly
+    every question is worded differently.
+    """
+    def search_cached(title: str, store: airing_store.AiringStore) -> Tuple[pd.DataFrame, str]:
+        return responses.get_or_build(version, 'search', title, lambda: search(title, store))
+    return search_cached
+
+
+def popular_titles(n: int, store: airing_store.AiringStore) -> List[str]:
+    """The ``n`` titles viewers ask about most, from the cached extractions.
+
+    Topped up with the titles that air most often when the extraction cache
+    knows fewer than ``n``.
+    """
+    counts = Counter(lm_studio.title_cache.values())
+    titles = [title for title, _ in counts.most_common(n)]
+    if len(titles) < n:
+        seen = {title_index.normalize_title(t) for t in titles}
+        for title in store.title_counts().index:
+            if len(titles) >= n:
+                break
+            if title is not None and title_index.normalize_title(str(title)) not in seen:
+                seen.add(title_index.normalize_title(str(title)))
+                titles.append(str(title))
+    return titles
+
+
+def warm(search: SearchFn, store: airing_store.AiringStore, version: str, n: int = WARM_TITLES) -> int:
+    """Answer the ``n`` most popular titles now, so their first askers hit the cache."""
+    global _warmed
+    with _warm_lock:
+        _warmed = version
+    search_cached = cached_search(search, version)
+    titles = popular_titles(n, store)
+    with instrumentation.span('response_cache_warm'):
+        for title in titles:
+            search_cached(title, store)
+    return len(titles)
+
+
+def ensure_warm(search: SearchFn, store: airing_store.AiringStore, version: str, n: int = WARM_TITLES) -> None:
+    """Warm the cache on a daemon thread, once per schedule version."""
+    global _warmed
+    with _warm_lock:
+        if _warmed == version:
+            return
+        _warmed = version
+    threading.Thread(target=warm, args=(search, store, version, n),
+                     name='response-cache-warm', daemon=True).start()
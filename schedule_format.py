@@ -0,0 +1,100 @@
+import string
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+import instrumentation
+import schedule_store
+
+DATE_FORMAT = "%A, %B %d"
+
+# The text of each airing in a JSON payload, and how many airings a payload lists by default and at most
+PAYLOAD_TEMPLATE = "📺 {title} on {channel}\n🗓️ {date}\n⏰ {start} – {end}"
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# "12:00 AM" ... "11:59 PM", indexed by minutes since midnight
+CLOCK_LABELS = np.array([f"{(m // 60) % 12 or 12:02d}:{m % 60:02d} {'AM' if m < 720 else 'PM'}"
+                         for m in range(24 * 60)], dtype=object)
+
+
+def clock_labels(minutes: pd.Series) -> pd.Series:
+    """Render minutes since midnight as "02:00 PM" labels; missing values become None."""
+    values = minutes.to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(values)
+    labels = np.full(len(values), None, dtype=object)
+    labels[valid] = CLOCK_LABELS[values[valid].astype(np.intp) % len(CLOCK_LABELS)]
+    return pd.Series(labels, index=minutes.index, dtype=object)
+
+
+def airing_labels(results: pd.DataFrame) -> pd.DataFrame:
+    """Display strings for every airing in ``results`` in one vectorized pass.
+
+    Columns: title, channel, date, start, end. Unknown dates or times are None.
+    """
+    start = results['Start Minutes'] if 'Start Minutes' in results else schedule_store.time_minutes(results['Start Time'])
+    end = results['End Minutes'] if 'End Minutes' in results else schedule_store.time_minutes(results['End Time'])
+    dates = pd.to_datetime(results['Date'], errors='coerce')
+    return pd.DataFrame({
+        'title': results['Program Title'].astype(str).astype(object),
+        'channel': results['Channel Name'].astype(str).astype(object),
+        'date': dates.dt.strftime(DATE_FORMAT).astype(object).where(dates.notna(), None),
+        'start': clock_labels(start),
+        'end': clock_labels(end),
+    }, index=results.index)
+
+
+def format_airings(results: pd.DataFrame, template: str, fallback: str = "{title} on {channel}") -> List[str]:
+    """Fill ``template`` (fields from airing_labels) for every airing, column-wise.
+
+    Rows with a missing date or time use ``fallback`` instead.
+    """
+    if results.empty:
+        return []
+    labels = airing_labels(results)
+    complete = labels[['date', 'start', 'end']].notna().all(axis=1)
+
+    def render(fmt: str) -> pd.Series:
+        out = pd.Series('', index=labels.index, dtype=object)
+        for literal, field, _, _ in string.Formatter().parse(fmt):
+            if literal:
+                out = out + literal
+            if field:
+                out = out + labels[field].fillna('')
+        return out
+
+    formatted = render(template)
+    if not complete.all():
+        formatted = formatted.where(complete, render(fallback))
+    return formatted.tolist()
+
+
+def airings_payload(results: pd.DataFrame, limit: int) -> List[Dict[str, Any]]:
+    """JSON-ready airings: display labels, ISO date and the same text the chatbot shows.
+
+    At most ``limit`` airings, capped at MAX_LIMIT; a limit below 1 is a ValueError.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    results = results.head(min(limit, MAX_LIMIT))
+    if results.empty:
+        return []
+    with instrumentation.span('format'):
+        labels = airing_labels(results)
+        formatted = format_airings(results, PAYLOAD_TEMPLATE, fallback="📺 {title} on {channel}")
+    dates = pd.to_datetime(results['Date'], errors='coerce')
+    sources = results['Source'] if 'Source' in results else pd.Series(None, index=results.index)
+    return [
+        {
+            'title': row.title,
+            'channel': row.channel,
+            'date': None if pd.isna(day) else day.date().isoformat(),
+            'date_label': row.date,
+            'start': row.start,
+            'end': row.end,
+            'source': source,
+            'text': text,
+        }
+        for row, day, source, text in zip(labels.itertuples(index=False), dates, sources, formatted)
+    ]
@@ -0,0 +1,156 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import airing_store
+import autocomplete
+import fuzzy_match
+import schedule_store
+import time_index
+import title_matcher
+
+# How often the workbooks are checked for changes
+POLL_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class ScheduleSnapshot:
+    """One consistent version of the schedule and everything built from it.
+
+    Snapshots are never modified; a reload builds a new one and swaps it in,
+    so a query that grabbed a snapshot keeps a consistent view until it ends.
+    The merged timeline is kept only as its packed ``store``; result frames
+    are decoded from it as they are needed.
+    """
+    store: airing_store.AiringStore
+    version: str
+    loaded_at: float
+
+    def memory_stats(self) -> Dict[str, float]:
+        """Resident bytes of the loaded schedule: the packed store plus the per-airing index arrays."""
+        return schedule_store.derived(self.store, 'memory_stats', lambda _: self._measure())
+
+    def _measure(self) -> Dict[str, float]:
+        store_bytes = self.store.nbytes
+        index_bytes = time_index.index_for(self.store).nbytes + autocomplete.completer_for(self.store).nbytes
+        airings = self.store.size
+        return {
+            'airings': airings,
+            'store_bytes': store_bytes,
+            'index_bytes': index_bytes,
+            'bytes': store_bytes + index_bytes,
+            'bytes_per_airing': round((store_bytes + index_bytes) / airings, 2) if airings else 0.0,
+        }
+
+
+def build_snapshot(override_path: str = schedule_store.OVERRIDE_FILE,
+                   regular_path: str = schedule_store.REGULAR_FILE) -> ScheduleSnapshot:
+    """Load both workbooks, pack the merged timeline and build the search indexes up front.
+
+    The loaded frames and the merged timeline are dropped once packed, so
+    only the store and the indexes over it stay resident.
+    """
+    override_df, override_version = schedule_store.load_versioned(override_path)
+    regular_df, regular_version = schedule_store.load_versioned(regular_path)
+    store = airing_store.pack(override_df, regular_df)
+    del override_df, regular_df
+
+    # Build indexes here, off the request path, rather than on the first query.
+    # Title searches go through the store itself; time questions use the
+    # interval index over the same airings.
+    autocomplete.completer_for(store)
+    time_index.index_for(store)
+    fuzzy_match.matcher_for(store)
+    title_matcher.matcher_for(store)
+
+    return ScheduleSnapshot(store, version=f"{override_version[:12]}-{regular_version[:12]}", loaded_at=time.time())
+
+
+class ScheduleReloader:
+    """Watch the schedule workbooks and hot-swap a rebuilt snapshot when they change.
+
+    The watcher polls file stats on a daemon thread. When a file changes it
+    waits for the size to settle (a copy may still be in progress), rebuilds
+    the snapshot on that same thread and then replaces the current one with
+    a single reference assignment. Readers never wait for a rebuild; a failed
+    rebuild keeps the previous snapshot and records the error.
+    """
+
+    def __init__(self, override_path: str = schedule_store.OVERRIDE_FILE,
+                 regular_path: str = schedule_store.REGULAR_FILE, interval: float = POLL_SECONDS):
+        self.override_path = override_path
+        self.regular_path = regular_path
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self.reloads = 0
+        self._snapshot: Optional[ScheduleSnapshot] = None
+        self._stamps: Optional[Tuple] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._load_lock = threading.Lock()
+
+    def _file_stamps(self) -> Tuple:
+        stamps = []
+        for path in (self.override_path, self.regular_path):
+            try:
+                stamps.append(schedule_store.file_fingerprint(path))
+            except FileNotFoundError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def _reload(self) -> None:
+        stamps = self._file_stamps()
+        snapshot = build_snapshot(self.override_path, self.regular_path)
+        self._stamps = stamps
+        self._snapshot = snapshot
+        self.reloads += 1
+
+    def current(self) -> ScheduleSnapshot:
+        """The live snapshot. Only the very first call loads on the caller's thread.
+
+        Raises FileNotFoundError if no snapshot could ever be loaded.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        with self._load_lock:
+            if self._snapshot is None:
+                self._reload()
+            self.ensure_started()
+            return self._snapshot
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            stamps = self._file_stamps()
+            if stamps == self._stamps:
+                continue
+            # Let a file that is still being copied in settle before reading it
+            self._stop.wait(self.interval)
+            if self._file_stamps() != stamps:
+                continue
+            try:
+                self._reload()
+                self.last_error = None
+            except Exception as e:
+                self._stamps = stamps
+                self.last_error = str(e)
+
+    def ensure_started(self) -> None:
+        """Start the watcher thread once per process."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='schedule-reloader', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+# Shared by every session in the process
+reloader = ScheduleReloader()
+
+
+def current() -> ScheduleSnapshot:
+    """The live schedule snapshot for the default workbooks."""
+    return reloader.current()
@@ -0,0 +1,248 @@
+import argparse
+import concurrent.futures
+import json
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from openai import APIConnectionError
+
+import airing_store
+import autocomplete
+import instrumentation
+import lm_studio
+import query_pipeline
+import response_cache
+import schedule_format
+import schedule_reload
+from lm_health import LMStudioUnavailable
+
+DEFAULT_LIMIT = schedule_format.DEFAULT_LIMIT
+MAX_LIMIT = schedule_format.MAX_LIMIT
+MAX_BODY_BYTES = 64 * 1024
+
+
+def _bounded_count(value: Any, name: str, maximum: int) -> int:
+    """``value`` as a count between 1 and ``maximum`` (larger values are capped); ValueError otherwise."""
+    try:
+        count = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a whole number") from None
+    if count < 1:
+        raise ValueError(f"'{name}' must be at least 1")
+    return min(count, maximum)
+
+
+class ScheduleRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints over the shared, read-only schedule snapshot.
+
+    GET  /health                    service, schedule and LM Studio status
+    GET  /metrics                   per-stage latency, Prometheus text (?format=json for JSON)
+    GET  /search?title=...&limit=N  title search, no model involved
+    GET  /complete?prefix=...&k=N   title suggestions while the viewer types
+    POST /extract  {"query": ...}   title extraction only
+    POST /query    {"query": ...}   extraction + search + formatting, like the chatbot
+    """
+
+    protocol_version = 'HTTP/1.1'  # keep-alive for clients that reuse connections
+    timeout = 15  # drop idle keep-alive connections so they don't pin a worker
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length < 0:
+            raise ValueError("invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ValueError("request body too large")
+        data = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(data, dict):
+            raise ValueError("request body must be a JSON object")
+        return data
+
+    def _read_query(self) -> Tuple[str, Dict[str, Any]]:
+        data = self._read_json()
+        query = str(data.get('query') or '').strip()
+        if not query:
+            raise ValueError("missing 'query'")
+        return query, data
+
+    def _send_text(self, status: int, text: str, content_type: str) -> None:
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, route, stage: str) -> None:
+        try:
+            with instrumentation.span(stage):
+                status, payload = route()
+        except ValueError as e:
+            status, payload = 400, {'error': str(e)}
+        except FileNotFoundError:
+            status, payload = 503, {'error': "schedule files not found"}
+        except Exception as e:
+            status, payload = 500, {'error': str(e)}
+        self._send_json(status, payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        if url.path == '/health':
+            self._handle(self._health, 'http_health')
+        elif url.path == '/metrics':
+            if params.get('format', [''])[0] == 'json':
+                self._send_json(200, instrumentation.metrics.snapshot())
+            else:
+                self._send_text(200, instrumentation.metrics.prometheus_text(), 'text/plain; version=0.0.4')
+        elif url.path == '/search':
+            self._handle(lambda: self._search(params), 'http_search')
+        elif url.path == '/complete':
+            self._handle(lambda: self._complete(params), 'http_complete')
+        else:
+            self._send_json(404, {'error': f"unknown path {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == '/extract':
+            self._handle(self._extract, 'http_extract')
+        elif url.path == '/query':
+            self._handle(self._query, 'http_query')
+        else:
+            self._send_json(404, {'error': f"unknown path {url.path}"})
+
+    def _health(self):
+        snapshot = schedule_reload.current()
+        lm_studio.health.ensure_started()
+        status = lm_studio.health.status()
+        return 200, {
+            'status': 'ok',
+            'schedule_version': snapshot.version,
+            'airings': snapshot.store.size,
+            'memory': snapshot.memory_stats(),
+            'lm_studio': {'ok': status.ok, 'error': status.error, 'breaker': lm_studio.breaker.state,
+                          'gateway': lm_studio.gateway.stats(), 'warmup': lm_studio.warmer.stats()},
+            'extractions': lm_studio.extraction_stats(),
+            'response_cache': response_cache.responses.stats(),
+        }
+
+    def _search(self, params):
+        title = params.get('title', [''])[0].strip()
+        if not title:
+            raise ValueError("missing 'title' parameter")
+        limit = _bounded_count(params.get('limit', [DEFAULT_LIMIT])[0], 'limit', MAX_LIMIT)
+        snapshot = schedule_reload.current()
+        response_cache.ensure_warm(airing_store.search_schedule, snapshot.store, snapshot.version)
+
+        def build():
+            with instrumentation.span('search'):
+                results, source = airing_store.search_schedule(title, snapshot.store)
+            return {'title': title, 'source': source, 'count': len(results),
+                    'schedule_version': snapshot.version, 'airings': schedule_format.airings_payload(results, limit)}
+        payload = response_cache.responses.get_or_build(snapshot.version, ('search', limit), title, build)
+        return 200, dict(payload, title=title)
+
+    def _complete(self, params):
+        prefix = params.get('prefix', [''])[0]
+        k = _bounded_count(params.get('k', [autocomplete.DEFAULT_SUGGESTIONS])[0], 'k', autocomplete.MAX_SUGGESTIONS)
+        snapshot = schedule_reload.current()
+        completions = autocomplete.completer_for(snapshot.store).complete(prefix, k)
+        return 200, {'prefix': prefix, 'schedule_version': snapshot.version,
+                     'titles': [{'title': title, 'upcoming': upcoming} for title, upcoming in completions]}
+
+    def _extract(self):
+        query, _ = self._read_query()
+        snapshot = schedule_reload.current()
+        try:
+            with instrumentation.span('extract_title'):
+                title = lm_studio.extract_show_title(query, snapshot.store, timeout=query_pipeline.LLM_TIMEOUT_SECONDS)
+        except (LMStudioUnavailable, APIConnectionError) as e:
+            # Down, unreachable or shedding load: the client may retry later
+            return 503, {'error': str(e)}
+        except concurrent.futures.TimeoutError:
+            return 503, {'error': "LM Studio did not answer in time"}
+        return 200, {'query': query, 'title': title}
+
+    def _query(self):
+        query, data = self._read_query()
+        limit = _bounded_count(data.get('limit', DEFAULT_LIMIT), 'limit', MAX_LIMIT)
+        snapshot = schedule_reload.current()
+        response_cache.ensure_warm(airing_store.search_schedule, snapshot.store, snapshot.version)
+        search = response_cache.cached_search(airing_store.search_schedule, snapshot.version)
+        result = query_pipeline.run_query(query, snapshot.store, search, raw_search=airing_store.search_schedule)
+        if result.path in query_pipeline.RAW_PATHS:
+            airings = schedule_format.airings_payload(result.results, limit)
+        else:
+            airings = response_cache.responses.get_or_build(snapshot.version, ('airings', limit), result.title,
+                                                            lambda: schedule_format.airings_payload(result.results, limit))
+        return 200, {
+            'query': query,
+            'title': result.title,
+            'path': result.path,
+            'source': result.source,
+            'count': len(result.results),
+            'schedule_version': snapshot.version,
+            'airings': airings,
+            'error': str(result.error) if result.error is not None else None,
+        }
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a fixed-size thread pool."""
+
+    def __init__(self, address, handler, workers: int = 16):
+        super().__init__(address, handler)
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='schedule-service')
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8080, workers: int = 16) -> None:
+    # Load the schedule (and start the reloader and LM Studio probe) before taking traffic
+    snapshot = schedule_reload.current()
+    warmed = response_cache.warm(airing_store.search_schedule, snapshot.store, snapshot.version)
+    lm_studio.health.ensure_started()
+    lm_studio.warmer.ensure_started()
+    instrumentation.metrics.ensure_dumping()
+    server = PooledHTTPServer((host, port), ScheduleRequestHandler, workers=workers)
+    print(f"📺 Schedule service on http://{host}:{port} ({workers} workers, schedule {snapshot.version}, "
+          f"{warmed} titles pre-answered)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless JSON API for the WGVU TV schedule.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.workers)
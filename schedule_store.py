@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+import workbook_ingest
+
+OVERRIDE_FILE = 'schedule_override.xlsx'
+REGULAR_FILE = 'sample_tv_schedule_with_dates.xlsx'
+
+# Compiled snapshots live next to the workbooks so every front-end shares them
+CACHE_DIR = '.schedule_cache'
+SNAPSHOT_FORMAT = 3
+
+# Air times are kept as minutes since midnight, and time slots as minutes since the epoch
+MINUTES_PER_DAY = 24 * 60
+
+# path -> ((mtime_ns, size), sha1, weakref to the compiled DataFrame)
+_loaded: Dict[str, Tuple[Tuple[int, int], str, weakref.ref]] = {}
+_lock = threading.Lock()
+
+# (id(source), name) -> (weakref to source, derived structure)
+_derived: Dict[Tuple[int, str], Tuple[weakref.ref, Any]] = {}
+_derived_lock = threading.RLock()
+
+
+def file_fingerprint(path: str) -> Tuple[int, int]:
+    """Cheap change check for a workbook: modification time and size."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _content_hash(path: str) -> str:
+    """Hash the workbook bytes so a touched-but-unchanged file isn't re-parsed."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _snapshot_path(path: str) -> str:
+    directory = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR)
+    return os.path.join(directory, os.path.basename(path) + '.pkl')
+
+
+def time_minutes(times: pd.Series) -> pd.Series:
+    """Minutes since midnight for clock values like "2:00 PM" or datetime.time (nullable Int16).
+
+    Each distinct value is parsed once, however many rows share it.
+    """
+    codes, uniques = pd.factorize(times.astype(str), use_na_sentinel=False)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='mixed', errors='coerce')
+    minutes = (parsed.dt.hour * 60 + parsed.dt.minute).astype('Int16')
+    return pd.Series(minutes.to_numpy()[codes], index=times.index, dtype='Int16')
+
+
+def compile_schedule(df: pd.DataFrame) -> pd.DataFrame:
+    """Clean a raw schedule sheet into the form every search path expects.
+
+    Besides the original columns, ``Start Minutes``/``End Minutes`` hold the
+    clock times as minutes since midnight so nothing re-parses "2:00 PM"
+    strings at query time.
+    """
+    df = df.dropna(subset=['Program Title']).copy()
+    df['Program Title'] = df['Program Title'].astype(str)
+    if 'Date' in df.columns:
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    if 'Start Time' in df.columns:
+        df['Start Minutes'] = time_minutes(df['Start Time'])
+    if 'End Time' in df.columns:
+        df['End Minutes'] = time_minutes(df['End Time'])
+    return df.reset_index(drop=True)
+
+
+def _read_snapshot(snapshot_path: str) -> Optional[dict]:
+    try:
+        with open(snapshot_path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None
+    return snapshot
+
+
+def _write_snapshot(snapshot_path: str, snapshot: dict) -> None:
+    # Write to a temp file and rename so a crashed write never leaves a torn snapshot
+    try:
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        # A read-only checkout still works, it just re-parses on each process start
+        pass
+
+
+def load_versioned(path: str) -> Tuple[pd.DataFrame, str]:
+    """Load one schedule workbook through its compiled snapshot, with its content hash.
+
+    The workbook is only parsed again when its mtime/size changes and its
+    content hash no longer matches the snapshot. The hash doubles as the
+    workbook's version. The frame is only held weakly here: once the caller
+    has packed it into an AiringStore and let go of it, the next load reads
+    the compiled snapshot again. Raises FileNotFoundError if the workbook
+    doesn't exist.
+    """
+    fingerprint = file_fingerprint(path)
+    key = os.path.abspath(path)
+
+    with _lock:
+        cached = _loaded.get(key)
+        current = cached[2]() if cached is not None else None
+        if current is not None and cached[0] == fingerprint:
+            return current, cached[1]
+
+        snapshot_path = _snapshot_path(path)
+        snapshot = _read_snapshot(snapshot_path)
+
+        if snapshot is None or snapshot['fingerprint'] != fingerprint:
+            sha1 = _content_hash(path)
+            if snapshot is not None and snapshot['sha1'] == sha1:
+                # Same bytes, new mtime: just re-stamp the snapshot
+                snapshot['fingerprint'] = fingerprint
+            else:
+                snapshot = {
+                    'format': SNAPSHOT_FORMAT,
+                    'fingerprint': fingerprint,
+                    'sha1': sha1,
+                    # Every schedule sheet, streamed, with only the columns search uses
+                    'frame': compile_schedule(workbook_ingest.read_workbook(path)),
+                }
+            _write_snapshot(snapshot_path, snapshot)
+
+        frame = snapshot['frame']
+        if current is not None and cached[1] == snapshot['sha1']:
+            # Unchanged content: keep the frame still in memory, and everything derived from it
+            frame = current
+        _loaded[key] = (fingerprint, snapshot['sha1'], weakref.ref(frame))
+        return frame, snapshot['sha1']
+
+
+def load_frame(path: str) -> pd.DataFrame:
+    """Load one schedule workbook through its compiled snapshot (see load_versioned)."""
+    return load_versioned(path)[0]
+
+
+def forget_loaded() -> None:
+    """Drop the in-process copies so the next load reads the on-disk snapshots again."""
+    with _lock:
+        _loaded.clear()
+
+
+def load_schedules(override_path: str = OVERRIDE_FILE,
+                   regular_path: str = REGULAR_FILE) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Load the override and regular schedules. Raises FileNotFoundError if either is missing."""
+    return load_frame(override_path), load_frame(regular_path)
+
+
+def derived(source: Any, name: str, build: Callable[[Any], Any]) -> Any:
+    """Return a structure built from ``source`` (an index over a store, say), building it once per source.
+
+    Loaded schedules are shared across reruns and sessions, so anything
+    derived from them is built on first use and then reused until the
+    schedule itself is replaced and garbage collected.
+    """
+    key = (id(source), name)
+    with _derived_lock:
+        entry = _derived.get(key)
+        if entry is not None and entry[0]() is source:
+            return entry[1]
+
+    value = build(source)
+
+    def _forget(_ref, key=key):
+        with _derived_lock:
+            current = _derived.get(key)
+            if current is not None and current[0] is _ref:
+                del _derived[key]
+
+    with _derived_lock:
+        entry = _derived.get(key)
+        if entry is not None and entry[0]() is source:
+            return entry[1]
+        _derived[key] = (weakref.ref(source, _forget), value)
+    return value
@@ -41,7 +41,7 @@ def test_lm_studio():
     try:
         # Initialize client with LM Studio base URL
         client = OpenAI(
-            base_url="http://127.0.0.1:1234/v1",  # Updated to use 127.0.0.1
+            base_url=os.getenv("LM_STUDIO_URL", "http://127.0.0.1:1234/v1"),  # Updated to use 127.0.0.1
             api_key="not-needed"  # LM Studio doesn't need an API key
         )
         print("✅ Successfully initialized LM Studio client")
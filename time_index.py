@@ -0,0 +1,156 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import airing_store
+import schedule_store
+
+
+def _epoch_minutes(when: datetime) -> int:
+    return int(np.datetime64(pd.Timestamp(when).to_pydatetime(), 'm').astype(np.int64))
+
+
+class ChannelSlots:
+    """One channel's airings as parallel arrays sorted by start time."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, rows: np.ndarray):
+        order = np.argsort(starts, kind='stable')
+        self.starts = starts[order]
+        self.ends = ends[order]
+        self.rows = rows[order]
+        # No airing is longer than this, so only starts within it of T can still be on at T
+        self.max_duration = int((self.ends - self.starts).max()) if len(self.starts) else 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.ends.nbytes + self.rows.nbytes
+
+    def overlapping(self, start: int, end: int) -> np.ndarray:
+        """Rows airing at any moment in [start, end) (a single instant when start == end)."""
+        lo = np.searchsorted(self.starts, start - self.max_duration, side='left')
+        hi = np.searchsorted(self.starts, max(end, start + 1), side='left')
+        ends = self.ends[lo:hi]
+        return self.rows[lo:hi][ends > start]
+
+
+class TimeSlotIndex:
+    """Interval index over a store's dated airings, per channel.
+
+    Start and end become absolute minutes (a program ending at or before
+    its start time runs past midnight), int32 like the store's own arrays.
+    Lookups bisect the sorted start array of each channel, so they cost
+    O(log n) plus the airings returned.
+    """
+
+    def __init__(self, store: airing_store.AiringStore):
+        self.channels: Dict[str, ChannelSlots] = {}
+        self.channel_names: Dict[str, str] = {}
+        start_minutes, end_minutes = store.minutes('Start Minutes'), store.minutes('End Minutes')
+        channels = store.encoded('Channel Name')
+        if start_minutes is None or end_minutes is None or channels is None:
+            return
+
+        valid = ((store.days != airing_store.NO_DAY) & (start_minutes != airing_store.NO_MINUTE)
+                 & (end_minutes != airing_store.NO_MINUTE))
+        rows = np.flatnonzero(valid).astype(np.int32)
+        day = store.days[valid] * schedule_store.MINUTES_PER_DAY
+        starts = day + start_minutes[valid]
+        ends = day + end_minutes[valid]
+        ends = np.where(ends <= starts, ends + schedule_store.MINUTES_PER_DAY, ends)
+
+        # Channels match case-insensitively; each distinct spelling is lowered once
+        codes, names = channels
+        names = ['' if pd.isna(name) else str(name) for name in names]
+        key_ids, keys = pd.factorize(pd.Series([name.lower() for name in names], dtype=object))
+        row_keys = key_ids[codes[valid]]
+        for key_id in np.unique(row_keys):
+            mask = row_keys == key_id
+            self.channels[str(keys[key_id])] = ChannelSlots(starts[mask], ends[mask], rows[mask])
+            self.channel_names[str(keys[key_id])] = names[codes[rows[mask][0]]]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(slots.nbytes for slots in self.channels.values())
+
+    def _slots(self, channel: Optional[str]) -> List[ChannelSlots]:
+        if channel is None:
+            return list(self.channels.values())
+        slots = self.channels.get(channel.lower())
+        return [slots] if slots is not None else []
+
+    def airing_between(self, start: datetime, end: datetime, channel: Optional[str] = None) -> np.ndarray:
+        """Store positions airing at any time in [start, end), optionally on one channel."""
+        lo, hi = _epoch_minutes(start), _epoch_minutes(end)
+        found = [slots.overlapping(lo, hi) for slots in self._slots(channel)]
+        return np.sort(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+    def airing_at(self, when: datetime, channel: Optional[str] = None) -> np.ndarray:
+        """Store positions on the air at instant ``when``, optionally on one channel."""
+        return self.airing_between(when, when, channel)
+
+
+def index_for(store: airing_store.AiringStore) -> TimeSlotIndex:
+    """The time-slot index for a loaded schedule's store, built once per store."""
+    return schedule_store.derived(store, 'time_slot_index', TimeSlotIndex)
+
+
+def airing_at(store: airing_store.AiringStore, when: datetime, channel: Optional[str] = None) -> pd.DataFrame:
+    """Airings on the air at ``when``, indexed by store position."""
+    positions = index_for(store).airing_at(when, channel)
+    return store.frame(positions).set_axis(positions)
+
+
+def airing_between(store: airing_store.AiringStore, start: datetime, end: datetime,
+                   channel: Optional[str] = None) -> pd.DataFrame:
+    """Airings on the air at any point in [start, end), indexed by store position."""
+    positions = index_for(store).airing_between(start, end, channel)
+    return store.frame(positions).set_axis(positions)
+
+
+_TIME_PATTERN = re.compile(r"\b(?:at|around|@)\s*(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)?", re.IGNORECASE)
+_BARE_TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)", re.IGNORECASE)
+
+
+def parse_time_query(query: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """The instant a "what's on at 8 tonight?" style question asks about, or None.
+
+    Without am/pm, hours 1-11 are read as evening unless the question says
+    "morning". "tomorrow" moves the date forward a day.
+    """
+    now = now or datetime.now()
+    match = _TIME_PATTERN.search(query) or _BARE_TIME_PATTERN.search(query)
+    if match is None:
+        if re.search(r"\b(right now|on now)\b", query, re.IGNORECASE):
+            return now
+        return None
+
+    hour, minute = int(match.group(1)), int(match.group(2) or 0)
+    if hour > 23 or minute > 59:
+        return None
+    suffix = (match.group(3) or '').lower().replace('.', '')
+    lowered = query.lower()
+    if suffix == 'pm' and hour < 12:
+        hour += 12
+    elif suffix == 'am' and hour == 12:
+        hour = 0
+    elif not suffix and 1 <= hour <= 11 and 'morning' not in lowered:
+        hour += 12
+
+    day: date = now.date() + timedelta(days=1 if 'tomorrow' in lowered else 0)
+    return datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, minutes=minute)
+
+
+def find_channel(query: str, *schedules: airing_store.AiringStore) -> Optional[str]:
+    """The longest channel name from the schedules mentioned in ``query``, if any."""
+    lowered = query.lower()
+    names = set()
+    for store in schedules:
+        if store is not None and store.size:
+            names.update(index_for(store).channel_names.values())
+    for name in sorted(names, key=len, reverse=True):
+        if name and re.search(rf"\b{re.escape(name.lower())}\b", lowered):
+            return name
+    return None
@@ -0,0 +1,179 @@
+import threading
+import weakref
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+import schedule_store
+
+# Partition key for rows without a usable date; they are never preempted
+UNDATED = pd.NaT
+
+
+def _days(df: pd.DataFrame) -> pd.Series:
+    return pd.to_datetime(df['Date'], errors='coerce').dt.normalize()
+
+
+def _partition(df: pd.DataFrame) -> Dict[pd.Timestamp, np.ndarray]:
+    """Row positions of ``df`` per day, in schedule order; undated rows are under UNDATED."""
+    days = _days(df)
+    parts = dict(days.groupby(days, sort=False).indices)
+    undated = np.flatnonzero(days.isna().to_numpy())
+    if len(undated):
+        parts[UNDATED] = undated
+    return parts
+
+
+def _day_hashes(df: pd.DataFrame, days: Dict[pd.Timestamp, np.ndarray]) -> Dict[pd.Timestamp, int]:
+    """A hash of each day's rows, in order, so an unchanged day is recognised in a new frame."""
+    if not days:
+        return {}
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return {day: hash(rows[positions].tobytes()) for day, positions in days.items()}
+
+
+def _changed(hashes: Dict[pd.Timestamp, int], previous: Dict[pd.Timestamp, int]) -> Set[pd.Timestamp]:
+    return {day for day in set(hashes) | set(previous) if hashes.get(day) != previous.get(day)}
+
+
+def absolute_minutes(df: pd.DataFrame):
+    """(valid mask, start, end) for each row as minutes since the epoch.
+
+    Rows missing a date or time are not valid; start and end only cover the
+    valid rows. An end at or before the start means the airing runs past
+    midnight.
+    """
+    dates = pd.to_datetime(df['Date'], errors='coerce')
+    start_minutes = df['Start Minutes'] if 'Start Minutes' in df else schedule_store.time_minutes(df['Start Time'])
+    end_minutes = df['End Minutes'] if 'End Minutes' in df else schedule_store.time_minutes(df['End Time'])
+    valid = (dates.notna() & start_minutes.notna() & end_minutes.notna()).to_numpy(dtype=bool)
+
+    day = dates[valid].dt.normalize().to_numpy(dtype='datetime64[m]').astype(np.int64)
+    starts = day + start_minutes[valid].to_numpy(dtype=np.int64)
+    ends = day + end_minutes[valid].to_numpy(dtype=np.int64)
+    ends = np.where(ends <= starts, ends + schedule_store.MINUTES_PER_DAY, ends)
+    return valid, starts, ends
+
+
+def _preempted(regular: pd.DataFrame, overrides: pd.DataFrame) -> np.ndarray:
+    """True for each regular row that overlaps an override on the same channel."""
+    preempted = np.zeros(len(regular), dtype=bool)
+    if regular.empty or overrides.empty:
+        return preempted
+    r_valid, r_start, r_end = absolute_minutes(regular)
+    o_valid, o_start, o_end = absolute_minutes(overrides)
+    r_channel = regular['Channel Name'].fillna('').astype(str).str.lower().to_numpy()[r_valid]
+    o_channel = overrides['Channel Name'].fillna('').astype(str).str.lower().to_numpy()[o_valid]
+
+    hit = np.zeros(len(r_start), dtype=bool)
+    for channel in np.unique(o_channel):
+        on_channel = r_channel == channel
+        mask = o_channel == channel
+        # Overrides per day are few, so compare each against every regular row on its channel
+        for start, end in zip(o_start[mask], o_end[mask]):
+            hit |= on_channel & (r_start < end) & (r_end > start)
+    preempted[np.flatnonzero(r_valid)] = hit
+    return preempted
+
+
+class TimelineBuilder:
+    """Materialize the override and regular schedules into one timeline.
+
+    Each regular airing that overlaps an override on the same channel is
+    dropped and the override takes its slot; every row carries a ``Source``
+    column ("Override" or "Regular"). The builder keeps a hash of each
+    day's rows and which of that day's regular airings are preempted, not
+    the frames themselves, so when only the override file changes just the
+    days whose overrides changed (and the day after, for overnight
+    programs) are compared again. The merged frame is only held weakly: it
+    is packed into an AiringStore and dropped (see schedule_reload).
+    """
+
+    def __init__(self):
+        self._override_hashes: Dict[pd.Timestamp, int] = {}
+        self._regular_hashes: Dict[pd.Timestamp, int] = {}
+        # Positions, among each day's regular rows, of the airings an override preempts
+        self._preempted: Dict[pd.Timestamp, np.ndarray] = {}
+        self._frames: Optional[Tuple[weakref.ref, weakref.ref, weakref.ref]] = None
+        self.last_rebuilt_days = 0
+        self._lock = threading.Lock()
+
+    def _preempt_day(self, day: pd.Timestamp, override_df: pd.DataFrame, override_days: Dict[pd.Timestamp, np.ndarray],
+                     regular_df: pd.DataFrame, regular_days: Dict[pd.Timestamp, np.ndarray]) -> None:
+        self._preempted.pop(day, None)
+        positions = regular_days.get(day)
+        if positions is None or pd.isna(day):
+            return
+        # An override that started the evening before may run into this day
+        nearby = [override_days[d] for d in (day - pd.Timedelta(days=1), day) if d in override_days]
+        if not nearby:
+            return
+        hit = _preempted(regular_df.iloc[positions], override_df.iloc[np.concatenate(nearby)])
+        if hit.any():
+            self._preempted[day] = np.flatnonzero(hit).astype(np.int32)
+
+    def _assemble(self, override_df: pd.DataFrame, regular_df: pd.DataFrame,
+                  regular_days: Dict[pd.Timestamp, np.ndarray]) -> pd.DataFrame:
+        keep = np.ones(len(regular_df), dtype=bool)
+        for day, preempted in self._preempted.items():
+            keep[regular_days[day][preempted]] = False
+        parts = []
+        if not override_df.empty:
+            parts.append(override_df.assign(Source='Override'))
+        if not regular_df.empty:
+            parts.append(regular_df[keep].assign(Source='Regular'))
+        if not parts:
+            # Keep the schedules' columns, so an empty timeline can still be searched
+            return pd.concat([override_df.iloc[:0], regular_df.iloc[:0]]).assign(Source=pd.Series(dtype=object))
+
+        # Day by day (undated rows last), then by start time and channel; overrides first in a tie
+        merged = pd.concat(parts, ignore_index=True)
+        keys = pd.DataFrame({'day': _days(merged)})
+        if 'Start Minutes' in merged:
+            keys['start'], keys['channel'] = merged['Start Minutes'], merged['Channel Name']
+        order = keys.sort_values(list(keys.columns), kind='stable', na_position='last').index
+        return merged.take(order).reset_index(drop=True)
+
+    def build(self, override_df: pd.DataFrame, regular_df: pd.DataFrame) -> pd.DataFrame:
+        """The merged timeline for these two frames, comparing again only the days that changed."""
+        with self._lock:
+            if self._frames is not None:
+                override_ref, regular_ref, timeline_ref = self._frames
+                timeline = timeline_ref()
+                if timeline is not None and override_ref() is override_df and regular_ref() is regular_df:
+                    return timeline
+
+            override_days = _partition(override_df) if not override_df.empty else {}
+            regular_days = _partition(regular_df) if not regular_df.empty else {}
+            override_hashes = _day_hashes(override_df, override_days)
+            regular_hashes = _day_hashes(regular_df, regular_days)
+
+            changed = _changed(override_hashes, self._override_hashes)
+            changed |= {day + pd.Timedelta(days=1) for day in changed if not pd.isna(day)}
+            changed |= _changed(regular_hashes, self._regular_hashes)
+            for day in changed:
+                self._preempt_day(day, override_df, override_days, regular_df, regular_days)
+
+            self._override_hashes, self._regular_hashes = override_hashes, regular_hashes
+            self.last_rebuilt_days = len(changed)
+            timeline = self._assemble(override_df, regular_df, regular_days)
+            self._frames = (weakref.ref(override_df), weakref.ref(regular_df), weakref.ref(timeline))
+            return timeline
+
+
+# One builder per process, shared by every session
+_builder = TimelineBuilder()
+
+
+def merged_timeline(override_df: pd.DataFrame, regular_df: pd.DataFrame) -> pd.DataFrame:
+    """The merged timeline for these schedules, through the shared builder."""
+    return _builder.build(override_df, regular_df)
+
+
+def source_label(matches: pd.DataFrame) -> str:
+    """"Override", "Regular" or "Combined", depending on where the matched airings came from."""
+    if matches.empty:
+        return "None"
+    sources = set(matches['Source'])
+    return sources.pop() if len(sources) == 1 else "Combined"
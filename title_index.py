@@ -0,0 +1,59 @@
+from typing import Dict, List, Set
+
+import numpy as np
+import pandas as pd
+
+GRAM = 3
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title or query the same way search_schedule always has: lowercase."""
+    return str(title).lower()
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+class TitleIndex:
+    """Trigram index over the distinct program titles of one schedule.
+
+    Each distinct normalized title is stored once along with the row
+    positions where it airs, so a query only touches the titles sharing its
+    trigrams and the rows of the titles that actually match.
+    """
+
+    def __init__(self, titles: pd.Series):
+        original = titles.fillna('').astype(str)
+        normalized = original.str.lower()
+        codes, uniques = pd.factorize(normalized, use_na_sentinel=False)
+        self.titles: List[str] = [str(t) for t in uniques]
+
+        # Group row positions by title id in one pass
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(self.titles) + 1))
+        self.rows: List[np.ndarray] = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.titles))]
+        # Spelling of each title as it first appears in the schedule, for display
+        self.display_titles: List[str] = [str(original.iat[order[bounds[i]]]) for i in range(len(self.titles))]
+
+        self.grams: Dict[str, Set[int]] = {}
+        for title_id, title in enumerate(self.titles):
+            for gram in _grams(title):
+                self.grams.setdefault(gram, set()).add(title_id)
+
+    def title_ids(self, query: str) -> List[int]:
+        """Ids of the distinct titles containing ``query`` as a substring."""
+        query = normalize_title(query)
+        if len(query) < GRAM:
+            # Too short to filter by trigram; distinct titles are still far fewer than rows
+            return [i for i, title in enumerate(self.titles) if query in title]
+
+        postings = []
+        for gram in _grams(query):
+            ids = self.grams.get(gram)
+            if not ids:
+                return []
+            postings.append(ids)
+        postings.sort(key=len)
+        candidates = set.intersection(*postings)
+        return sorted(i for i in candidates if query in self.titles[i])
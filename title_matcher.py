@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import airing_store
+import schedule_store
+from fuzzy_match import fuzzy_form
+
+# Shorter titles are too likely to turn up inside ordinary words of a question
+MIN_TITLE_LENGTH = 3
+
+
+class TitleMatcher:
+    """Aho-Corasick automaton over a schedule's known titles.
+
+    ``find`` scans a viewer's message once, in time linear in its length,
+    and returns the longest known title that appears in it on word
+    boundaries.
+    """
+
+    def __init__(self, titles: Iterable[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # Longest pattern ending at each node, and the next node on the fail chain that ends one
+        self.output: List[Optional[Tuple[int, str]]] = [None]
+        self.output_link: List[int] = [-1]
+
+        for title in titles:
+            form = fuzzy_form(title)
+            if len(form) < MIN_TITLE_LENGTH:
+                continue
+            node = 0
+            for ch in form:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(None)
+                    self.output_link.append(-1)
+                node = nxt
+            if self.output[node] is None:
+                self.output[node] = (len(form), title)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                target = self.goto[state].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                fallback = self.fail[child]
+                self.output_link[child] = fallback if self.output[fallback] is not None else self.output_link[fallback]
+
+    def find(self, text: str) -> Optional[Tuple[int, str]]:
+        """(length, title) of the longest whole-word title in ``text``, or None."""
+        text = fuzzy_form(text)
+        best = None
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+
+            candidate = node if self.output[node] is not None else self.output_link[node]
+            if end + 1 < len(text) and text[end + 1] != ' ':
+                continue
+            while candidate > 0:
+                length, title = self.output[candidate]
+                start = end - length + 1
+                if (start == 0 or text[start - 1] == ' ') and (best is None or length > best[0]):
+                    best = (length, title)
+                candidate = self.output_link[candidate]
+        return best
+
+
+def matcher_for(store: airing_store.AiringStore) -> TitleMatcher:
+    """The title matcher for a loaded schedule's store, built once per store."""
+    return schedule_store.derived(store, 'title_matcher', lambda s: TitleMatcher(s.title_index.display_titles))
+
+
+def match_title(query: str, *schedules: airing_store.AiringStore) -> Optional[str]:
+    """The longest known title named in ``query`` across the given schedules, if any."""
+    best = None
+    for store in schedules:
+        if store is None or not store.size:
+            continue
+        found = matcher_for(store).find(query)
+        if found is not None and (best is None or found[0] > best[0]):
+            best = found
+    return best[1] if best is not None else None
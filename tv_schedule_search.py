@@ -1,67 +1,56 @@
-import pandas as pd
+import argparse
+import concurrent.futures
+import json
+import sys
+from collections import deque
 from datetime import datetime
 
+import pandas as pd
+
+import airing_store
+import query_pipeline
+import schedule_format
+import schedule_store
+
+NO_OVERRIDES = pd.DataFrame()
+
+# Fields read from a batch line, in order of preference, when it is a JSON object
+QUERY_FIELDS = ('query', 'question', 'message', 'title')
+ID_FIELDS = ('id', 'request_id')
+
+AIRING_TEMPLATE = "📺 *{title}* airs on {channel} 📡\n🗓️  {date}\n⏰  {start} – {end}\n" + "-" * 50
+
+def print_airings(matches):
+    # Format date and time nicely, for all matches at once
+    for airing in schedule_format.format_airings(matches, AIRING_TEMPLATE,
+                                                 fallback="📺 *{title}* airs on {channel} 📡\n" + "-" * 50):
+        print(airing)
+
+def load_store():
+    """Both schedules merged and packed into an airing store; the override file is optional."""
+    try:
+        override_df = schedule_store.load_frame(schedule_store.OVERRIDE_FILE)
+    except FileNotFoundError:
+        override_df = NO_OVERRIDES
+    return airing_store.pack(override_df, schedule_store.load_frame(schedule_store.REGULAR_FILE))
+
 def search_tv_schedule(show_title):
     try:
-        # First try to read the override file
-        try:
-            override_df = pd.read_excel('schedule_override.xlsx')
-            override_df = override_df.dropna(subset=['Program Title'])
-            override_df['Program Title'] = override_df['Program Title'].fillna('').astype(str)
-            
-            # Search in override file
-            override_matches = override_df[override_df['Program Title'].str.lower().str.contains(show_title, na=False, case=False)]
-            
-            if not override_matches.empty:
-                print("\n🎯 Found in schedule overrides:")
-                print("=" * 50)
-                for _, row in override_matches.iterrows():
-                    show_date = row['Date']
-                    start_time = row['Start Time']
-                    end_time = row['End Time']
-                    
-                    # Format date and time nicely
-                    formatted_date = pd.to_datetime(show_date).strftime("%A, %B %d")
-                    formatted_start = pd.to_datetime(str(start_time)).strftime("%I:%M %p")
-                    formatted_end = pd.to_datetime(str(end_time)).strftime("%I:%M %p")
-                    
-                    print(f"📺 *{row['Program Title']}* airs on {row['Channel Name']} 📡")
-                    print(f"🗓️  {formatted_date}")
-                    print(f"⏰  {formatted_start} – {formatted_end}")
-                    print("-" * 50)
-                return
-        except FileNotFoundError:
-            # If override file doesn't exist, continue to regular schedule
-            pass
-        
-        # If no override found, check regular schedule
-        df = pd.read_excel('sample_tv_schedule_with_dates.xlsx')
-        df = df.dropna(subset=['Program Title'])
-        df['Program Title'] = df['Program Title'].fillna('').astype(str)
+        store = load_store()
         
-        matches = df[df['Program Title'].str.lower().str.contains(show_title, na=False, case=False)]
+        # Search the merged timeline, where overrides have already replaced the regular slots they preempt
+        matches, source = airing_store.search_schedule(show_title, store)
         
         if matches.empty:
             print(f"\n❌ Sorry, I couldn't find any shows matching '{show_title}'")
             return
         
         print(f"\n🎯 Found {len(matches)} airing(s) of shows matching '{show_title}':")
+        if source != "Regular":
+            print("(includes special programming from the schedule overrides)")
         print("=" * 50)
         
-        for _, row in matches.iterrows():
-            show_date = row['Date']
-            start_time = row['Start Time']
-            end_time = row['End Time']
-            
-            # Format date and time nicely
-            formatted_date = pd.to_datetime(show_date).strftime("%A, %B %d")
-            formatted_start = pd.to_datetime(str(start_time)).strftime("%I:%M %p")
-            formatted_end = pd.to_datetime(str(end_time)).strftime("%I:%M %p")
-            
-            print(f"📺 *{row['Program Title']}* airs on {row['Channel Name']} 📡")
-            print(f"🗓️  {formatted_date}")
-            print(f"⏰  {formatted_start} – {formatted_end}")
-            print("-" * 50)
+        print_airings(matches)
             
     except FileNotFoundError:
         print("❌ Error: Required schedule files not found.")
@@ -69,7 +58,114 @@ def search_tv_schedule(show_title):
     except Exception as e:
         print(f"❌ An error occurred: {str(e)}")
 
+def parse_batch_line(number, line):
+    """(id, query) for one batch line: a JSON object, a JSON string or plain text."""
+    try:
+        item = json.loads(line)
+    except ValueError:
+        return number, line.strip()
+    if isinstance(item, dict):
+        item_id = next((item[f] for f in ID_FIELDS if f in item), number)
+        query = next((item[f] for f in QUERY_FIELDS if isinstance(item.get(f), str)), None)
+        return item_id, query
+    return number, item if isinstance(item, str) else None
+
+def answer_batch_query(item_id, query, store, limit, extract):
+    """One output record: the title searched, how it was found and the first ``limit`` airings."""
+    record = {'id': item_id, 'query': query}
+    if not query or not query.strip():
+        return dict(record, error="no query on this line")
+    try:
+        if extract:
+            answer = query_pipeline.run_query(query, store, airing_store.search_schedule)
+            title, results, source, path = answer.title, answer.results, answer.source, answer.path
+            if answer.error is not None:
+                record['extraction_error'] = str(answer.error) or type(answer.error).__name__
+        else:
+            title, path = query.strip(), 'raw_search'
+            results, source = airing_store.search_schedule(title, store)
+        return dict(record, title=title, path=path, source=source, count=len(results),
+                    airings=schedule_format.airings_payload(results, limit))
+    except Exception as e:
+        return dict(record, error=str(e) or type(e).__name__)
+
+def run_batch(lines, out, workers=8, limit=schedule_format.DEFAULT_LIMIT, extract=True):
+    """Answer every query in ``lines`` and write one JSON line per input line, in input order.
+
+    The schedule is loaded (merged and packed into its search store) once
+    up front. Up to ``workers`` queries are answered at a time; each
+    result is written as soon as it and every line before it are done, and
+    only a few batches of lines are read ahead, so memory stays flat for
+    files of any size. Returns the number of lines answered.
+    """
+    store = load_store()
+
+    pending = deque()
+    written = 0
+
+    def write_oldest():
+        out.write(json.dumps(pending.popleft().result(), ensure_ascii=False) + "\n")
+        out.flush()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch-query') as executor:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            item_id, query = parse_batch_line(number, line)
+            pending.append(executor.submit(answer_batch_query, item_id, query, store, limit, extract))
+            written += 1
+            if len(pending) >= workers * 4:
+                write_oldest()
+        while pending:
+            write_oldest()
+    return written
+
+def batch_main(args):
+    try:
+        lines = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+    except OSError as e:
+        print(f"❌ Error: Can't read batch file '{args.batch}': {e.strerror}", file=sys.stderr)
+        return 1
+    try:
+        out = sys.stdout if args.output in (None, '-') else open(args.output, 'w', encoding='utf-8')
+    except OSError as e:
+        print(f"❌ Error: Can't write output file '{args.output}': {e.strerror}", file=sys.stderr)
+        if lines is not sys.stdin:
+            lines.close()
+        return 1
+    started = datetime.now()
+    try:
+        answered = run_batch(lines, out, workers=args.workers, limit=args.limit, extract=not args.no_extract)
+    except FileNotFoundError as e:
+        print(f"❌ Error: Required schedule file not found: {e.filename}", file=sys.stderr)
+        return 1
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+        if out is not sys.stdout:
+            out.close()
+    seconds = (datetime.now() - started).total_seconds()
+    print(f"✅ Answered {answered} queries in {seconds:.2f}s", file=sys.stderr)
+    return 0
+
 def main():
+    parser = argparse.ArgumentParser(description="Search the TV schedule, interactively or in batch.")
+    parser.add_argument('--batch', metavar='PATH',
+                        help="answer the queries in a JSONL file ('-' for stdin) and print JSONL results")
+    parser.add_argument('--output', metavar='PATH', help="write batch results here instead of stdout")
+    parser.add_argument('--workers', type=int, default=8, help="queries answered at the same time in batch mode")
+    parser.add_argument('--limit', type=int, default=schedule_format.DEFAULT_LIMIT,
+                        help="airings listed per batch result")
+    parser.add_argument('--no-extract', action='store_true',
+                        help="search each query as typed instead of extracting the title first")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.limit < 1:
+        parser.error("--limit must be at least 1")
+    if args.batch:
+        sys.exit(batch_main(args))
+
     print("📺 TV Schedule Search Bot 📺")
     print("=" * 30)
     print("Hi! I can help you find when your favorite shows are airing.")
@@ -0,0 +1,144 @@
+import concurrent.futures
+import multiprocessing
+import os
+import zipfile
+from typing import List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Everything search, formatting and the timeline read; other columns are skipped while reading
+SEARCH_COLUMNS = ('Program Title', 'Channel Name', 'Date', 'Start Time', 'End Time')
+
+# Rows turned into a DataFrame at a time, so a sheet is never held as one big list of tuples
+CHUNK_ROWS = 50_000
+
+# Starting worker processes costs about a second, so small workbooks are read in-process
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+WORKERS = int(os.getenv('SCHEDULE_INGEST_WORKERS', '0')) or os.cpu_count() or 1
+
+SheetTask = Tuple[str, Tuple[str, ...], Optional[Tuple[str, ...]], int]
+
+
+def sheet_names(path: str) -> List[str]:
+    """Worksheet names in workbook order, from xl/workbook.xml without loading any cells."""
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    return [element.get('name') for element in root.iter() if element.tag.rsplit('}', 1)[-1] == 'sheet']
+
+
+def _chunk_frame(rows: List[tuple], names: List[str]) -> pd.DataFrame:
+    return pd.DataFrame.from_records(rows, columns=names)
+
+
+def _read_rows(worksheet, columns: Optional[Sequence[str]], chunk_rows: int) -> Optional[pd.DataFrame]:
+    rows = worksheet.iter_rows(values_only=True)
+    header = next((row for row in rows if any(value is not None for value in row)), None)
+    if header is None:
+        return None
+    labels = [str(value).strip() if value is not None else '' for value in header]
+    if 'Program Title' not in labels:
+        return None
+
+    wanted = [name for name in dict.fromkeys(labels) if name and (columns is None or name in columns)]
+    positions = [labels.index(name) for name in wanted]
+    width = max(positions) + 1
+
+    chunks = []
+    buffer = []
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        values = tuple(row[i] for i in positions)
+        if any(value is not None for value in values):
+            buffer.append(values)
+        if len(buffer) >= chunk_rows:
+            chunks.append(_chunk_frame(buffer, wanted))
+            buffer = []
+    if buffer or not chunks:
+        chunks.append(_chunk_frame(buffer, wanted))
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+
+def read_sheets(path: str, sheets: Sequence[str], columns: Optional[Sequence[str]] = SEARCH_COLUMNS,
+                chunk_rows: int = CHUNK_ROWS) -> List[Optional[pd.DataFrame]]:
+    """Worksheets of one workbook streamed in openpyxl's read-only mode, keeping only ``columns``.
+
+    The workbook (and its shared-strings table, often the slowest part) is
+    opened once for all of ``sheets``. In each sheet the first non-empty
+    row is the header; a sheet without a Program Title column (a notes or
+    summary sheet, say) comes back as None.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return [_read_rows(workbook[sheet], columns, chunk_rows) for sheet in sheets]
+    finally:
+        workbook.close()
+
+
+def _read_task(task: SheetTask) -> List[Optional[pd.DataFrame]]:
+    path, sheets, columns, chunk_rows = task
+    return read_sheets(path, sheets, columns, chunk_rows)
+
+
+def _combine(frames: List[pd.DataFrame], columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    frames = [frame for frame in frames if frame is not None]
+    if not frames:
+        return pd.DataFrame(columns=list(columns or ['Program Title']))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_workbooks(paths: Sequence[str], columns: Optional[Sequence[str]] = SEARCH_COLUMNS,
+                   workers: int = WORKERS, chunk_rows: int = CHUNK_ROWS) -> List[pd.DataFrame]:
+    """Every schedule sheet of every workbook in ``paths``, one DataFrame per workbook.
+
+    A workbook's sheets (one per week or per channel, say) are stacked in
+    sheet order. When there is more than one sheet and the files are big
+    enough to repay starting processes, sheets are parsed in parallel on a
+    process pool. Sheets are streamed one at a time, so memory peaks at one
+    sheet being parsed per worker on top of the result. Raises
+    FileNotFoundError for a missing workbook.
+    """
+    wanted = tuple(columns) if columns is not None else None
+    sheets = {}
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        sheets[path] = sheet_names(path)
+
+    size = sum(os.path.getsize(path) for path in paths)
+    total = sum(len(names) for names in sheets.values())
+    parallel = workers > 1 and total > 1 and size >= PARALLEL_MIN_BYTES
+    # Each task opens its workbook once, so split a workbook's sheets into as few runs as the pool can use
+    tasks: List[SheetTask] = []
+    for path, names in sheets.items():
+        runs = min(len(names), max(1, round(workers * len(names) / total))) if parallel else 1
+        step = -(-len(names) // runs) if names else 1
+        tasks.extend((path, tuple(names[i:i + step]), wanted, chunk_rows) for i in range(0, len(names), step))
+
+    if parallel and len(tasks) > 1:
+        # spawn rather than fork: the apps that load schedules run background threads
+        context = multiprocessing.get_context('spawn')
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                                        mp_context=context) as pool:
+                results = list(pool.map(_read_task, tasks))
+        except (concurrent.futures.process.BrokenProcessPool, OSError):
+            # No usable worker processes here (an interactive session, say); read in-process instead
+            results = [_read_task(task) for task in tasks]
+    else:
+        results = [_read_task(task) for task in tasks]
+
+    by_path = {path: [] for path in paths}
+    for (path, *_), frames in zip(tasks, results):
+        by_path[path].extend(frames)
+    return [_combine(by_path[path], columns) for path in paths]
+
+
+def read_workbook(path: str, columns: Optional[Sequence[str]] = SEARCH_COLUMNS,
+                  workers: int = WORKERS) -> pd.DataFrame:
+    """The schedule sheets of one workbook (see read_workbooks)."""
+    return read_workbooks([path], columns, workers)[0]